@@ -0,0 +1,117 @@
+import atexit
+import collections
+import datetime
+import json
+import os
+import random
+import sys
+import threading
+
+
+def _encode(entry):
+    return json.dumps(entry, separators=(',', ':')).encode('utf-8')
+
+
+def parse_sample_rates(spec):
+    # "health=0.01,liveness=0" -> {'health': 0.01, 'liveness': 0.0}
+    rates = {}
+    for part in spec.split(','):
+        name, _, rate = part.partition('=')
+        if name.strip() and rate.strip():
+            rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class AccessLog:
+    # JSON-lines access log kept off the request path. Callers check sampled()
+    # before building an entry, and log() only appends it to a bounded
+    # in-memory queue; a background thread encodes and writes whatever has
+    # accumulated in one batch, every `flush_interval` seconds or as soon as
+    # `batch_size` entries are waiting.
+    # When the writer cannot keep up, entries are dropped and counted rather
+    # than making requests wait.
+
+    def __init__(self, target, max_queue=10000, batch_size=256, flush_interval=1.0,
+                 sample_rates=None, encode=None, record=None, name='access_log'):
+        self.target = target
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = min(batch_size, max(1, max_queue // 2))
+        self.flush_interval = flush_interval
+        self.sample_rates = dict(sample_rates or {})
+        self.dropped = 0
+        self._encode = encode or _encode
+        self._record = record or (lambda kind, label, amount: None)
+        self._pending = collections.deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self.flush)
+
+    def _after_fork(self):
+        self._pending = collections.deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._file = None
+
+    @property
+    def enabled(self):
+        return bool(self.target)
+
+    def sampled(self, label):
+        rate = self.sample_rates.get(label, 1.0)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+    def log(self, entry):
+        pending = self._pending
+        if len(pending) >= self.max_queue:
+            self.dropped += 1
+            self._record(f'{self.name}_dropped', '', 1)
+            return
+        pending.append(entry)
+        if self._thread is None:
+            self._start()
+        elif len(pending) >= self.batch_size:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name.replace('_', '-'), daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending = self._pending
+            if not pending:
+                return
+            lines = []
+            for _ in range(len(pending)):
+                entry = pending.popleft()
+                entry['time'] = datetime.datetime.fromtimestamp(entry['time'], datetime.timezone.utc).isoformat()
+                lines.append(self._encode(entry))
+            lines.append(b'')
+            try:
+                self._output().write(b'\n'.join(lines))
+                self._file.flush()
+            except (OSError, ValueError):
+                self.dropped += len(lines) - 1
+                self._record(f'{self.name}_dropped', '', len(lines) - 1)
+
+    def _output(self):
+        if self._file is None:
+            if self.target == '-':
+                self._file = sys.stdout.buffer
+            else:
+                self._file = open(self.target, 'ab')
+        return self._file
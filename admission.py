@@ -0,0 +1,100 @@
+import collections
+import math
+import threading
+import time
+
+
+class Rejected(Exception):
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    # Per-worker concurrency limit with a bounded, time-limited wait queue,
+    # plus an optional token bucket per client. Requests that cannot be
+    # admitted are rejected straight away instead of piling up until the
+    # ingress times them out.
+
+    def __init__(self, max_concurrency=0, max_queue=0, queue_timeout=1.0,
+                 rate=0.0, burst=0, retry_after=1, max_clients=10000, record=None):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.rate = rate
+        self.burst = burst or max(1, math.ceil(rate))
+        self.retry_after = retry_after
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = collections.Counter()
+        self._record = record or (lambda kind, label, amount: None)
+        self._slots = threading.Condition()
+        self._buckets = collections.OrderedDict()
+        self._buckets_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_concurrency > 0 or self.rate > 0
+
+    def check_rate(self, client):
+        if self.rate <= 0 or not client:
+            return
+        now = time.monotonic()
+        with self._buckets_lock:
+            bucket = self._buckets.pop(client, None)
+            if bucket is None:
+                tokens = float(self.burst)
+            else:
+                tokens = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            admitted = tokens >= 1.0
+            if admitted:
+                tokens -= 1.0
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        if not admitted:
+            self._reject('rate_limited', math.ceil((1.0 - tokens) / self.rate))
+
+    def acquire(self, client=None, wait=True):
+        # wait=False is for callers on an event loop: a full worker rejects
+        # immediately instead of parking the thread in the queue.
+        self.check_rate(client)
+        if self.max_concurrency <= 0:
+            return False
+        with self._slots:
+            if self.in_flight < self.max_concurrency:
+                self._admit()
+                return True
+            if not wait or self.waiting >= self.max_queue:
+                self._reject('queue_full', self.retry_after)
+            self.waiting += 1
+            self._record('admission_queue', '', 1)
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.in_flight >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._reject('queue_timeout', self.retry_after)
+                    self._slots.wait(remaining)
+            finally:
+                self.waiting -= 1
+                self._record('admission_queue', '', -1)
+            self._admit()
+            return True
+
+    def release(self):
+        with self._slots:
+            self.in_flight -= 1
+            self._record('admission_in_flight', '', -1)
+            self._slots.notify()
+
+    def _admit(self):
+        self.in_flight += 1
+        self._record('admission_in_flight', '', 1)
+
+    def _reject(self, reason, retry_after):
+        self.shed[reason] += 1
+        self._record('admission_shed', reason, 1)
+        raise Rejected(reason, max(1, retry_after))
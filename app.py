@@ -1,12 +1,430 @@
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, Response, abort, g, redirect, request
+from markupsafe import escape
+from werkzeug.exceptions import HTTPException
 import os
 import socket
+import sys
 import datetime
-
-app = Flask(__name__)
+import hmac
+import math
+import time
+
+from accesslog import AccessLog, parse_sample_rates
+from admission import AdmissionController, Rejected
+from compression import ENCODINGS, compress_body, compress_response, negotiate, stream_compressed
+from content import ContentDirectory
+from events import EventStream
+from health import HealthState
+from jsonprovider import FastJSONProvider
+from metrics import MetricsRegistry
+from microcache import MicroCache
+from pages import FRAGMENT_MARKER, PageStore, build_asset, serve_page
+from profiler import ProfilerBusy, SamplingProfiler
+from search import LazySearchIndex
+from timing import REQUEST_STARTED, RequestClock, RequestTiming
+from tracing import Tracer
+
+app = Flask(__name__, static_folder=None)
+app.json = FastJSONProvider(app)
+app.wsgi_app = RequestClock(app.wsgi_app)
+registry = MetricsRegistry(os.getenv('PROMETHEUS_MULTIPROC_DIR'))
+profiler = SamplingProfiler()
 
 VERSION = os.getenv('APP_VERSION', '1.0.0')
 ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')
+PAGE_MAX_AGE = int(os.getenv('PAGE_MAX_AGE', '300'))
+CONTENT_DIR = os.getenv('CONTENT_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content'))
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '256'))
+HEALTH_CHECK_INTERVAL = float(os.getenv('HEALTH_CHECK_INTERVAL', '5'))
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', '0') == '1'
+SERVER_TIMING = os.getenv('SERVER_TIMING', '0') == '1'
+DEBUG_TOKEN = os.getenv('DEBUG_TOKEN', '')
+ADMISSION_MAX_CONCURRENCY = int(os.getenv('ADMISSION_MAX_CONCURRENCY', '0'))
+ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', str(ADMISSION_MAX_CONCURRENCY * 2)))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1'))
+ADMISSION_RATE = float(os.getenv('ADMISSION_RATE', '0'))
+ADMISSION_BURST = int(os.getenv('ADMISSION_BURST', '0'))
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+ADMISSION_TRUST_FORWARDED = os.getenv('ADMISSION_TRUST_FORWARDED', '0') == '1'
+MICROCACHE_TTL = float(os.getenv('MICROCACHE_TTL', '1'))
+MICROCACHE_SIZE = int(os.getenv('MICROCACHE_SIZE', '64'))
+METRICS_STREAM_INTERVAL = float(os.getenv('METRICS_STREAM_INTERVAL', '2'))
+METRICS_STREAM_MAX_SUBSCRIBERS = int(os.getenv('METRICS_STREAM_MAX_SUBSCRIBERS', '0'))
+ACCESS_LOG = os.getenv('ACCESS_LOG', '')
+ACCESS_LOG_SAMPLE = parse_sample_rates(os.getenv('ACCESS_LOG_SAMPLE', ''))
+ACCESS_LOG_QUEUE = int(os.getenv('ACCESS_LOG_QUEUE', '10000'))
+ACCESS_LOG_BATCH = int(os.getenv('ACCESS_LOG_BATCH', '256'))
+ACCESS_LOG_FLUSH_INTERVAL = float(os.getenv('ACCESS_LOG_FLUSH_INTERVAL', '1'))
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0'))
+TRACE_BUFFER_SIZE = int(os.getenv('TRACE_BUFFER_SIZE', '1000'))
+TRACE_EXPORT_FILE = os.getenv('TRACE_EXPORT_FILE', '')
+# The sync worker only heartbeats between requests, so anything that holds
+# its one thread past WEB_TIMEOUT gets it killed.
+SYNC_WORKER = os.getenv('WEB_WORKER_CLASS') == 'sync'
+# A profile request blocks its thread for the whole run: keep it inside the
+# worker timeout, and refuse it on the sync worker, which would be killed
+# and has no other request threads to sample anyway.
+PROFILE_MAX_SECONDS = max(1, min(60, int(os.getenv('WEB_TIMEOUT', '30')) - 5))
+PROFILE_SUPPORTED = not SYNC_WORKER
+BATCH_MAX_REQUESTS = 16
+SEARCH_MAX_RESULTS = 50
+# A probe needs a free thread itself, so with N threads at most N - 1 other
+# requests can be in flight while it runs: that is the saturation point. The
+# asgi mode answers probes on the event loop and turns this off (asgi.py).
+READINESS_MAX_IN_FLIGHT = int(os.getenv('READINESS_MAX_IN_FLIGHT',
+                                        str(max(0, int(os.getenv('WEB_THREADS', '1')) - 1))))
+
+registry.describe('admission_queue', 'admission_queue_depth', 'gauge',
+                  'Requests waiting for an admission slot.')
+registry.describe('admission_in_flight', 'admission_in_flight', 'gauge',
+                  'Admitted requests being processed.')
+registry.describe('admission_shed', 'admission_shed_total', 'counter',
+                  'Requests rejected by admission control.', label='reason')
+admission = AdmissionController(max_concurrency=ADMISSION_MAX_CONCURRENCY,
+                                max_queue=ADMISSION_MAX_QUEUE,
+                                queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+                                rate=ADMISSION_RATE,
+                                burst=ADMISSION_BURST,
+                                retry_after=ADMISSION_RETRY_AFTER,
+                                record=registry.add)
+registry.describe('microcache', 'microcache_lookups_total', 'counter',
+                  'Micro-cache lookups by result.', label='result')
+microcache = MicroCache(MICROCACHE_TTL, MICROCACHE_SIZE, record=registry.add)
+registry.describe('access_log_dropped', 'access_log_dropped_total', 'counter',
+                  'Access log lines dropped because the queue was full or the write failed.')
+access_log = AccessLog(ACCESS_LOG, max_queue=ACCESS_LOG_QUEUE, batch_size=ACCESS_LOG_BATCH,
+                       flush_interval=ACCESS_LOG_FLUSH_INTERVAL, sample_rates=ACCESS_LOG_SAMPLE,
+                       encode=lambda entry: app.json.encode(entry), record=registry.add)
+registry.describe('trace_export_dropped', 'trace_export_dropped_total', 'counter',
+                  'Traces not exported because the queue was full or the write failed.')
+tracer = Tracer(TRACE_SAMPLE_RATE, TRACE_BUFFER_SIZE,
+                export=AccessLog(TRACE_EXPORT_FILE, encode=lambda entry: app.json.encode(entry),
+                                 record=registry.add, name='trace_export') if TRACE_EXPORT_FILE else None)
+
+CACHE_POLICIES = {
+    'info': 'no-cache',
+    'info_api': 'no-cache',
+    'health': 'no-store',
+    'liveness': 'no-store',
+    'readiness': 'no-store',
+    'metrics': 'no-store',
+    'prometheus': 'no-store',
+    'debug_profile': 'no-store',
+    'batch': 'no-store',
+    'metrics_stream': 'no-store',
+    'debug_traces': 'no-store',
+    'search': f'public, max-age={PAGE_MAX_AGE}',
+}
+
+STYLESHEET = """
+* { margin: 0; padding: 0; box-sizing: border-box; }
+
+@keyframes fadeIn {
+    from { opacity: 0; transform: translateY(20px); }
+    to { opacity: 1; transform: translateY(0); }
+}
+
+@keyframes slideIn {
+    from { transform: translateX(-100%); opacity: 0; }
+    to { transform: translateX(0); opacity: 1; }
+}
+
+@keyframes pulse {
+    0%, 100% { transform: scale(1); }
+    50% { transform: scale(1.05); }
+}
+
+@keyframes gradient {
+    0% { background-position: 0% 50%; }
+    50% { background-position: 100% 50%; }
+    100% { background-position: 0% 50%; }
+}
+
+@keyframes float {
+    0%, 100% { transform: translateY(0px); }
+    50% { transform: translateY(-10px); }
+}
+
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    background: linear-gradient(-45deg, #667eea, #764ba2, #f093fb, #4facfe);
+    background-size: 400% 400%;
+    animation: gradient 15s ease infinite;
+    color: #333;
+    min-height: 100vh;
+}
+
+nav {
+    background: rgba(255, 255, 255, 0.95);
+    padding: 1rem 2rem;
+    box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+    backdrop-filter: blur(10px);
+    animation: slideIn 0.6s ease-out;
+}
+
+nav ul {
+    list-style: none;
+    display: flex;
+    gap: 1.5rem;
+    align-items: center;
+    flex-wrap: wrap;
+}
+
+nav a {
+    text-decoration: none;
+    color: #667eea;
+    font-weight: 600;
+    transition: all 0.3s ease;
+    position: relative;
+}
+
+nav a::after {
+    content: '';
+    position: absolute;
+    bottom: -5px;
+    left: 0;
+    width: 0;
+    height: 2px;
+    background: #667eea;
+    transition: width 0.3s ease;
+}
+
+nav a:hover::after { width: 100%; }
+nav a:hover { color: #764ba2; transform: translateY(-2px); }
+
+.badge {
+    display: inline-block;
+    padding: 0.3rem 0.8rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border-radius: 20px;
+    font-size: 0.85rem;
+    margin-left: auto;
+    animation: pulse 2s ease-in-out infinite;
+}
+
+.container {
+    max-width: 1400px;
+    margin: 2rem auto;
+    padding: 2rem;
+    background: rgba(255, 255, 255, 0.95);
+    border-radius: 15px;
+    box-shadow: 0 20px 60px rgba(0,0,0,0.3);
+    animation: fadeIn 0.8s ease-out;
+    backdrop-filter: blur(10px);
+}
+
+.grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
+    gap: 2rem;
+    margin-top: 2rem;
+}
+
+.card {
+    padding: 2rem;
+    background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
+    border-radius: 15px;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.1);
+    text-align: center;
+    transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
+    animation: fadeIn 0.6s ease-out backwards;
+}
+
+.card:nth-child(1) { animation-delay: 0.1s; }
+.card:nth-child(2) { animation-delay: 0.2s; }
+.card:nth-child(3) { animation-delay: 0.3s; }
+.card:nth-child(4) { animation-delay: 0.4s; }
+
+.card:hover {
+    transform: translateY(-10px) scale(1.02);
+    box-shadow: 0 15px 40px rgba(102, 126, 234, 0.4);
+}
+
+.card h3 { margin: 1rem 0 0.5rem 0; color: #333; }
+.card p { color: #666; }
+
+.icon {
+    font-size: 3rem;
+    animation: float 3s ease-in-out infinite;
+}
+
+.concept-card {
+    padding: 2rem;
+    background: linear-gradient(135deg, #f8f9fa 0%, #fff 100%);
+    border-left: 5px solid #667eea;
+    border-radius: 10px;
+    margin-bottom: 1.5rem;
+    transition: all 0.3s ease;
+    animation: fadeIn 0.6s ease-out backwards;
+}
+
+.concept-card:hover {
+    transform: translateX(5px);
+    box-shadow: 0 10px 30px rgba(102, 126, 234, 0.2);
+}
+
+.concept-card h2 { color: #667eea; margin-bottom: 1rem; }
+.concept-card h3 { color: #555; margin: 1.5rem 0 1rem 0; }
+.concept-card p, .concept-card li { color: #666; line-height: 1.8; }
+.concept-card ul { margin: 1rem 0 1rem 2rem; }
+
+.tools {
+    display: flex;
+    gap: 0.5rem;
+    flex-wrap: wrap;
+    margin-top: 1rem;
+}
+
+.tool-badge {
+    padding: 0.4rem 1rem;
+    background: white;
+    border: 2px solid #667eea;
+    border-radius: 20px;
+    color: #667eea;
+    font-weight: 600;
+    font-size: 0.9rem;
+    transition: all 0.3s ease;
+    cursor: pointer;
+}
+
+.tool-badge:hover {
+    background: #667eea;
+    color: white;
+    transform: translateY(-2px);
+    box-shadow: 0 5px 15px rgba(102, 126, 234, 0.3);
+}
+
+.architecture-diagram {
+    background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
+    padding: 2rem;
+    border-radius: 15px;
+    margin: 2rem 0;
+    text-align: center;
+    animation: fadeIn 0.8s ease-out;
+}
+
+.component-box {
+    display: inline-block;
+    padding: 1rem 1.5rem;
+    margin: 0.5rem;
+    background: white;
+    border: 2px solid #667eea;
+    border-radius: 10px;
+    font-weight: 600;
+    transition: all 0.3s ease;
+    cursor: pointer;
+}
+
+.component-box:hover {
+    transform: scale(1.05) rotate(-2deg);
+    box-shadow: 0 8px 20px rgba(102, 126, 234, 0.3);
+}
+
+.link-button {
+    display: inline-block;
+    padding: 0.8rem 1.5rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    text-decoration: none;
+    border-radius: 25px;
+    margin: 0.5rem;
+    transition: all 0.3s ease;
+    font-weight: 600;
+    box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3);
+}
+
+.link-button:hover {
+    transform: translateY(-3px);
+    box-shadow: 0 8px 25px rgba(102, 126, 234, 0.5);
+}
+
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 1.5rem 0;
+    animation: fadeIn 0.8s ease-out;
+}
+
+th, td {
+    padding: 1rem;
+    text-align: left;
+    border-bottom: 1px solid #ddd;
+}
+
+th {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    font-weight: 600;
+}
+
+tr { transition: all 0.3s ease; }
+
+tr:hover {
+    background: #f8f9fa;
+    transform: scale(1.01);
+}
+
+.hero {
+    text-align: center;
+    padding: 3rem 0;
+    animation: fadeIn 1s ease-out;
+}
+
+.hero h1 {
+    font-size: 3rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+    background-clip: text;
+    margin-bottom: 1rem;
+}
+
+.hero p {
+    font-size: 1.3rem;
+    color: #666;
+    margin-bottom: 2rem;
+}
+
+.highlight {
+    margin-top: 3rem;
+    padding: 2rem;
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    border-radius: 15px;
+}
+
+.highlight ul {
+    text-align: left;
+    margin: 1.5rem auto;
+    max-width: 600px;
+    line-height: 2;
+}
+
+code {
+    background: #2d2d2d;
+    padding: 0.2rem 0.6rem;
+    border-radius: 4px;
+    font-family: 'Courier New', monospace;
+    color: #f8f8f2;
+    font-size: 0.9em;
+}
+
+pre {
+    background: #2d2d2d;
+    color: #f8f8f2;
+    padding: 1.5rem;
+    border-radius: 10px;
+    overflow-x: auto;
+    margin: 1rem 0;
+    box-shadow: 0 5px 15px rgba(0,0,0,0.2);
+}
+
+pre code {
+    background: transparent;
+    padding: 0;
+}
+"""
 
 BASE_TEMPLATE = """
 <!DOCTYPE html>
@@ -15,315 +433,7 @@ BASE_TEMPLATE = """
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>DevOps Learning Platform</title>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        
-        @keyframes fadeIn {
-            from { opacity: 0; transform: translateY(20px); }
-            to { opacity: 1; transform: translateY(0); }
-        }
-        
-        @keyframes slideIn {
-            from { transform: translateX(-100%); opacity: 0; }
-            to { transform: translateX(0); opacity: 1; }
-        }
-        
-        @keyframes pulse {
-            0%, 100% { transform: scale(1); }
-            50% { transform: scale(1.05); }
-        }
-        
-        @keyframes gradient {
-            0% { background-position: 0% 50%; }
-            50% { background-position: 100% 50%; }
-            100% { background-position: 0% 50%; }
-        }
-        
-        @keyframes float {
-            0%, 100% { transform: translateY(0px); }
-            50% { transform: translateY(-10px); }
-        }
-        
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            background: linear-gradient(-45deg, #667eea, #764ba2, #f093fb, #4facfe);
-            background-size: 400% 400%;
-            animation: gradient 15s ease infinite;
-            color: #333;
-            min-height: 100vh;
-        }
-        
-        nav {
-            background: rgba(255, 255, 255, 0.95);
-            padding: 1rem 2rem;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            backdrop-filter: blur(10px);
-            animation: slideIn 0.6s ease-out;
-        }
-        
-        nav ul {
-            list-style: none;
-            display: flex;
-            gap: 1.5rem;
-            align-items: center;
-            flex-wrap: wrap;
-        }
-        
-        nav a {
-            text-decoration: none;
-            color: #667eea;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            position: relative;
-        }
-        
-        nav a::after {
-            content: '';
-            position: absolute;
-            bottom: -5px;
-            left: 0;
-            width: 0;
-            height: 2px;
-            background: #667eea;
-            transition: width 0.3s ease;
-        }
-        
-        nav a:hover::after { width: 100%; }
-        nav a:hover { color: #764ba2; transform: translateY(-2px); }
-        
-        .badge {
-            display: inline-block;
-            padding: 0.3rem 0.8rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border-radius: 20px;
-            font-size: 0.85rem;
-            margin-left: auto;
-            animation: pulse 2s ease-in-out infinite;
-        }
-        
-        .container {
-            max-width: 1400px;
-            margin: 2rem auto;
-            padding: 2rem;
-            background: rgba(255, 255, 255, 0.95);
-            border-radius: 15px;
-            box-shadow: 0 20px 60px rgba(0,0,0,0.3);
-            animation: fadeIn 0.8s ease-out;
-            backdrop-filter: blur(10px);
-        }
-        
-        .grid {
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
-            gap: 2rem;
-            margin-top: 2rem;
-        }
-        
-        .card {
-            padding: 2rem;
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border-radius: 15px;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-            text-align: center;
-            transition: all 0.4s cubic-bezier(0.175, 0.885, 0.32, 1.275);
-            animation: fadeIn 0.6s ease-out backwards;
-        }
-        
-        .card:nth-child(1) { animation-delay: 0.1s; }
-        .card:nth-child(2) { animation-delay: 0.2s; }
-        .card:nth-child(3) { animation-delay: 0.3s; }
-        .card:nth-child(4) { animation-delay: 0.4s; }
-        
-        .card:hover {
-            transform: translateY(-10px) scale(1.02);
-            box-shadow: 0 15px 40px rgba(102, 126, 234, 0.4);
-        }
-        
-        .card h3 { margin: 1rem 0 0.5rem 0; color: #333; }
-        .card p { color: #666; }
-        
-        .icon {
-            font-size: 3rem;
-            animation: float 3s ease-in-out infinite;
-        }
-        
-        .concept-card {
-            padding: 2rem;
-            background: linear-gradient(135deg, #f8f9fa 0%, #fff 100%);
-            border-left: 5px solid #667eea;
-            border-radius: 10px;
-            margin-bottom: 1.5rem;
-            transition: all 0.3s ease;
-            animation: fadeIn 0.6s ease-out backwards;
-        }
-        
-        .concept-card:hover {
-            transform: translateX(5px);
-            box-shadow: 0 10px 30px rgba(102, 126, 234, 0.2);
-        }
-        
-        .concept-card h2 { color: #667eea; margin-bottom: 1rem; }
-        .concept-card h3 { color: #555; margin: 1.5rem 0 1rem 0; }
-        .concept-card p, .concept-card li { color: #666; line-height: 1.8; }
-        .concept-card ul { margin: 1rem 0 1rem 2rem; }
-        
-        .tools {
-            display: flex;
-            gap: 0.5rem;
-            flex-wrap: wrap;
-            margin-top: 1rem;
-        }
-        
-        .tool-badge {
-            padding: 0.4rem 1rem;
-            background: white;
-            border: 2px solid #667eea;
-            border-radius: 20px;
-            color: #667eea;
-            font-weight: 600;
-            font-size: 0.9rem;
-            transition: all 0.3s ease;
-            cursor: pointer;
-        }
-        
-        .tool-badge:hover {
-            background: #667eea;
-            color: white;
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(102, 126, 234, 0.3);
-        }
-        
-        .architecture-diagram {
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            padding: 2rem;
-            border-radius: 15px;
-            margin: 2rem 0;
-            text-align: center;
-            animation: fadeIn 0.8s ease-out;
-        }
-        
-        .component-box {
-            display: inline-block;
-            padding: 1rem 1.5rem;
-            margin: 0.5rem;
-            background: white;
-            border: 2px solid #667eea;
-            border-radius: 10px;
-            font-weight: 600;
-            transition: all 0.3s ease;
-            cursor: pointer;
-        }
-        
-        .component-box:hover {
-            transform: scale(1.05) rotate(-2deg);
-            box-shadow: 0 8px 20px rgba(102, 126, 234, 0.3);
-        }
-        
-        .link-button {
-            display: inline-block;
-            padding: 0.8rem 1.5rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            text-decoration: none;
-            border-radius: 25px;
-            margin: 0.5rem;
-            transition: all 0.3s ease;
-            font-weight: 600;
-            box-shadow: 0 4px 15px rgba(102, 126, 234, 0.3);
-        }
-        
-        .link-button:hover {
-            transform: translateY(-3px);
-            box-shadow: 0 8px 25px rgba(102, 126, 234, 0.5);
-        }
-        
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 1.5rem 0;
-            animation: fadeIn 0.8s ease-out;
-        }
-        
-        th, td {
-            padding: 1rem;
-            text-align: left;
-            border-bottom: 1px solid #ddd;
-        }
-        
-        th {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            font-weight: 600;
-        }
-        
-        tr { transition: all 0.3s ease; }
-        
-        tr:hover {
-            background: #f8f9fa;
-            transform: scale(1.01);
-        }
-        
-        .hero {
-            text-align: center;
-            padding: 3rem 0;
-            animation: fadeIn 1s ease-out;
-        }
-        
-        .hero h1 {
-            font-size: 3rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            -webkit-background-clip: text;
-            -webkit-text-fill-color: transparent;
-            background-clip: text;
-            margin-bottom: 1rem;
-        }
-        
-        .hero p {
-            font-size: 1.3rem;
-            color: #666;
-            margin-bottom: 2rem;
-        }
-        
-        .highlight {
-            margin-top: 3rem;
-            padding: 2rem;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border-radius: 15px;
-        }
-        
-        .highlight ul {
-            text-align: left;
-            margin: 1.5rem auto;
-            max-width: 600px;
-            line-height: 2;
-        }
-        
-        code {
-            background: #2d2d2d;
-            padding: 0.2rem 0.6rem;
-            border-radius: 4px;
-            font-family: 'Courier New', monospace;
-            color: #f8f8f2;
-            font-size: 0.9em;
-        }
-        
-        pre {
-            background: #2d2d2d;
-            color: #f8f8f2;
-            padding: 1.5rem;
-            border-radius: 10px;
-            overflow-x: auto;
-            margin: 1rem 0;
-            box-shadow: 0 5px 15px rgba(0,0,0,0.2);
-        }
-        
-        pre code {
-            background: transparent;
-            padding: 0;
-        }
-    </style>
+    <link rel="stylesheet" href="{{ stylesheet_url }}">
 </head>
 <body>
     <nav>
@@ -344,503 +454,466 @@ BASE_TEMPLATE = """
 </html>
 """
 
-HOME_CONTENT = """
-<div class="hero">
-    <h1>  Dev Platform  </h1>
-    <p> ☸️ Master Kubernetes, API Gateway 🌐, and Cloud-Native Technologies ☁️ </p>
-    
-    <div class="grid">
-        <div class="card">
-            <div class="icon">☸️</div>
-            <h3>Kubernetes</h3>
-            <p>Container Orchestration</p>
-        </div>
-        <div class="card">
-            <div class="icon">🚪</div>
-            <h3>Ingress & Gateway</h3>
-            <p>Traffic Management</p>
-        </div>
-        <div class="card">
-            <div class="icon">🦍</div>
-            <h3>Kong Gateway</h3>
-            <p>API Management</p>
-        </div>
-        <div class="card">
-            <div class="icon">☁️</div>
-            <h3>Alibaba ACK</h3>
-            <p>Managed K8s Service</p>
-        </div>
-    </div>
-    
-    <div class="highlight">
-        <h2>🎯 Platform Features</h2>
-        <ul>
-            <li>✅ Multi-platform Docker builds (AMD64/ARM64)</li>
-            <li>✅ Kubernetes deployment with HPA</li>
-            <li>✅ ArgoCD GitOps workflow</li>
-            <li>✅ GitHub Actions CI/CD</li>
-            <li>✅ Kong Ingress Controller</li>
-            <li>✅ Gateway API with HTTPRoute</li>
-        </ul>
-    </div>
-</div>
-"""
+STYLESHEET_ASSET = build_asset('app.css', STYLESHEET.encode('utf-8'), 'text/css')
+STYLESHEET_URL = f'/static/{STYLESHEET_ASSET.name}'
+ASSETS = {STYLESHEET_ASSET.name: STYLESHEET_ASSET}
 
-KUBERNETES_CONTENT = """
-<h1 style="color: #667eea; text-align: center; margin-bottom: 2rem;">☸️ Kubernetes Architecture</h1>
-
-<div class="concept-card">
-    <h2>📖 Official Documentation</h2>
-    <p>Kubernetes is an open-source container orchestration platform for automating deployment, scaling, and management.</p>
-    <a href="https://kubernetes.io/docs/" target="_blank" class="link-button">Official Docs</a>
-    <a href="https://kubernetes.io/docs/concepts/architecture/" target="_blank" class="link-button">Architecture Guide</a>
-</div>
-
-<div class="architecture-diagram">
-    <h3 style="color: #667eea; margin-bottom: 1.5rem;">Kubernetes Cluster Architecture</h3>
-    <div style="background: #e3f2fd; padding: 1.5rem; border-radius: 8px; margin-bottom: 1rem;">
-        <strong style="color: #1976d2;">Control Plane</strong><br><br>
-        <div class="component-box">API Server</div>
-        <div class="component-box">etcd</div>
-        <div class="component-box">Scheduler</div>
-        <div class="component-box">Controller Manager</div>
-    </div>
-    <div style="font-size: 2rem; color: #667eea;">⬇️</div>
-    <div style="background: #f3e5f5; padding: 1.5rem; border-radius: 8px; margin-top: 1rem;">
-        <strong style="color: #7b1fa2;">Worker Nodes</strong><br><br>
-        <div class="component-box">kubelet</div>
-        <div class="component-box">kube-proxy</div>
-        <div class="component-box">Container Runtime</div>
-        <div class="component-box">Pods</div>
-    </div>
-</div>
-
-<div class="concept-card">
-    <h2>📦 Core Components</h2>
-    <h3>Control Plane</h3>
-    <ul>
-        <li><code>kube-apiserver</code> - Exposes the Kubernetes HTTP API</li>
-        <li><code>etcd</code> - Consistent key-value store for cluster data</li>
-        <li><code>kube-scheduler</code> - Assigns Pods to nodes</li>
-        <li><code>kube-controller-manager</code> - Runs controller processes</li>
-    </ul>
-    
-    <h3>Worker Node Components</h3>
-    <ul>
-        <li><code>kubelet</code> - Ensures containers are running in Pods</li>
-        <li><code>kube-proxy</code> - Network proxy for Service communication</li>
-        <li><code>Container Runtime</code> - containerd, CRI-O, Docker</li>
-    </ul>
-</div>
-
-<div class="concept-card">
-    <h2>🔧 Essential kubectl Commands</h2>
-    <pre><code># Cluster info
-kubectl cluster-info
-kubectl get nodes
-
-# Pod operations
-kubectl get pods -A
-kubectl logs &lt;pod-name&gt;
-kubectl exec -it &lt;pod-name&gt; -- /bin/bash
-
-# Deployments
-kubectl apply -f deployment.yaml
-kubectl rollout status deployment/&lt;name&gt;</code></pre>
-</div>
-"""
-
-INGRESS_CONTENT = """
-<h1 style="color: #667eea; text-align: center; margin-bottom: 2rem;">🚪 Ingress & Gateway API</h1>
-
-<div class="concept-card">
-    <h2>📖 Kubernetes Ingress</h2>
-    <p>Ingress manages external access to services in a cluster, typically HTTP/HTTPS.</p>
-    
-    <h3>Ingress Example</h3>
-    <pre><code>
-apiVersion: networking.k8s.io/v1
-kind: Ingress
-metadata:
-  name: flask-ingress
-spec:
-  rules:
-  - host: flask.example.com
-    http:
-      paths:
-      - path: /
-        pathType: Prefix
-        backend:
-          service:
-            name: flask-service
-            port:
-              number: 5000</code></pre>
-</div>
-
-<div class="architecture-diagram">
-    <h3 style="color: #667eea;">Ingress Traffic Flow</h3>
-    <div style="background: #fff3e0; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>🌐 External Traffic</strong>
-    </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #e3f2fd; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Ingress Controller</strong>
-    </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #e8f5e9; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Service</strong>
+INFO_CONTENT = """
+    <h1 style="color: #667eea; text-align: center; margin-bottom: 2rem;">ℹ️ Deployment Information</h1>
+    <div style="background: #f8f9fa; padding: 2rem; border-radius: 10px;">
+        <table>
+            {rows}
+        </table>
     </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #f3e5f5; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Pods</strong>
+    <div style="margin-top: 2rem; padding: 1.5rem; background: #e8f5e9; border-left: 5px solid #4caf50; border-radius: 5px;">
+        <strong style="color: #2e7d32;">✅ Status:</strong> Application running successfully!
     </div>
-</div>
-
-<div class="concept-card">
-    <h2>🚀 Gateway API - Next Generation</h2>
-    <p>Gateway API provides more expressive, extensible, and role-oriented API for traffic management.</p>
-    
-    <h3>HTTPRoute Example</h3>
-    <pre><code>
-apiVersion: gateway.networking.k8s.io/v1
-kind: HTTPRoute
-metadata:
-  name: flask-route
-spec:
-  parentRefs:
-  - name: my-gateway
-  hostnames:
-  - "flask.example.com"
-  rules:
-  - matches:
-    - path:
-        type: PathPrefix
-        value: /
-    backendRefs:
-    - name: flask-service
-      port: 5000</code></pre>
-</div>
-
-<div class="concept-card">
-    <h2>⚖️ Ingress vs Gateway API</h2>
-    <table>
-        <tr>
-            <th>Feature</th>
-            <th>Ingress</th>
-            <th>Gateway API</th>
-        </tr>
-        <tr>
-            <td>Architecture</td>
-            <td>Flat (single resource)</td>
-            <td>Layered (Gateway → Route)</td>
-        </tr>
-        <tr>
-            <td>Protocol Support</td>
-            <td>HTTP/HTTPS only</td>
-            <td>HTTP, TCP, UDP, gRPC</td>
-        </tr>
-        <tr>
-            <td>Extensibility</td>
-            <td>Annotations</td>
-            <td>CRD-based</td>
-        </tr>
-        <tr>
-            <td>Traffic Management</td>
-            <td>Basic routing</td>
-            <td>Advanced (splitting, mirroring)</td>
-        </tr>
-    </table>
-</div>
-"""
+    """
 
-KONG_CONTENT = """
-<h1 style="color: #667eea; text-align: center; margin-bottom: 2rem;">🦍 Kong Gateway & Ingress Controller</h1>
-
-<div class="concept-card">
-    <h2>📖 What is Kong?</h2>
-    <p>Kong Gateway is a cloud-native, fast, and flexible API gateway for microservices and distributed architectures.</p>
-    
-    <h3>Key Features</h3>
-    <ul>
-        <li>🚀 High-performance API gateway (OpenResty/LuaJIT)</li>
-        <li>🔌 60+ plugins for auth, security, traffic control</li>
-        <li>☸️ Native Kubernetes Ingress Controller</li>
-        <li>🌐 Multi-cloud and hybrid deployment</li>
-        <li>🤖 AI Gateway for LLM traffic management</li>
-    </ul>
-    
-    <div style="margin-top: 1rem;">
-        <a href="https://konghq.com" target="_blank" class="link-button">Kong Official</a>
-        <a href="https://docs.konghq.com/kubernetes-ingress-controller" target="_blank" class="link-button">KIC Docs</a>
-    </div>
-</div>
+INFO_ROW = '<tr><td style="font-weight: 600; color: #667eea;">{label}</td><td>{value}</td></tr>'
 
-<div class="architecture-diagram">
-    <h3 style="color: #667eea;">Kong Ingress Controller Architecture</h3>
-    <div style="background: #fff3e0; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>🌐 External Traffic</strong>
-    </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #e1f5fe; padding: 1.5rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Kong Gateway (Data Plane)</strong><br>
-        <div class="component-box">Load Balancer</div>
-        <div class="component-box">Plugins</div>
-        <div class="component-box">Router</div>
-    </div>
-    <div style="font-size: 2rem;">⬅️ Configures</div>
-    <div style="background: #f3e5f5; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Kong Ingress Controller</strong>
-    </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #e8f5e9; padding: 1rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Kubernetes Services & Pods</strong>
-    </div>
-</div>
-
-<div class="concept-card">
-    <h2>📝 Kong Ingress Example</h2>
-    <pre><code>
-apiVersion: networking.k8s.io/v1
-kind: Ingress
-metadata:
-  name: flask-ingress
-  annotations:
-    konghq.com/strip-path: "true"
-    konghq.com/plugins: rate-limiting, cors
-spec:
-  ingressClassName: kong
-  rules:
-  - host: flask.example.com
-    http:
-      paths:
-      - path: /api
-        pathType: Prefix
-        backend:
-          service:
-            name: flask-service
-            port:
-              number: 5000</code></pre>
-</div>
-
-<div class="concept-card">
-    <h2>🔌 Popular Kong Plugins</h2>
-    <table>
-        <tr>
-            <th>Category</th>
-            <th>Plugins</th>
-        </tr>
-        <tr>
-            <td>🔐 Authentication</td>
-            <td>key-auth, jwt, oauth2, basic-auth</td>
-        </tr>
-        <tr>
-            <td>🚦 Traffic Control</td>
-            <td>rate-limiting, request-size-limiting</td>
-        </tr>
-        <tr>
-            <td>🔄 Transformation</td>
-            <td>request-transformer, response-transformer</td>
-        </tr>
-        <tr>
-            <td>📊 Analytics</td>
-            <td>prometheus, datadog, zipkin</td>
-        </tr>
-        <tr>
-            <td>🛡️ Security</td>
-            <td>cors, ip-restriction, bot-detection</td>
-        </tr>
-    </table>
-</div>
-
-<div class="concept-card">
-    <h2>💡 Kong Best Practices</h2>
-    <ul>
-        <li>Use DB-less mode with Kubernetes for GitOps</li>
-        <li>Apply plugins at appropriate levels (global/service/route)</li>
-        <li>Enable rate limiting to protect backend services</li>
-        <li>Use HTTPRoute for advanced Gateway API routing</li>
-        <li>Monitor with Prometheus plugin integration</li>
-        <li>Implement proper authentication for production APIs</li>
-    </ul>
-</div>
-"""
+_base_template = None
 
-ACK_CONTENT = """
-<h1 style="color: #667eea; text-align: center; margin-bottom: 2rem;">☁️ Alibaba Cloud Container Service (ACK)</h1>
-
-<div class="concept-card">
-    <h2>📖 What is ACK?</h2>
-    <p>Alibaba Cloud Container Service for Kubernetes (ACK) is a fully managed Kubernetes service with deep integration into Alibaba Cloud services.</p>
-    
-    <h3>Key Benefits</h3>
-    <ul>
-        <li>Fully managed control plane</li>
-        <li>High availability across multiple zones</li>
-        <li>Deep integration with VPC, SLB, OSS, NAS</li>
-        <li>Built-in security and compliance</li>
-        <li>Auto-scaling and disaster recovery</li>
-    </ul>
-    
-    <a href="https://www.alibabacloud.com/product/kubernetes" target="_blank" class="link-button">ACK Product Page</a>
-    <a href="https://www.alibabacloud.com/help/container-service-for-kubernetes" target="_blank" class="link-button">Documentation</a>
-</div>
-
-<div class="architecture-diagram">
-    <h3 style="color: #667eea;">ACK Service Architecture</h3>
-    <div style="background: #fff3e0; padding: 1.5rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>☁️ Alibaba Cloud Services</strong><br>
-        <div class="component-box">VPC</div>
-        <div class="component-box">SLB</div>
-        <div class="component-box">OSS</div>
-        <div class="component-box">NAS</div>
-    </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #e3f2fd; padding: 1.5rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>ACK Managed Control Plane</strong><br>
-        <div class="component-box">API Server (HA)</div>
-        <div class="component-box">etcd (3 nodes)</div>
-        <div class="component-box">Scheduler</div>
-    </div>
-    <div style="font-size: 2rem;">⬇️</div>
-    <div style="background: #f3e5f5; padding: 1.5rem; border-radius: 8px; margin: 1rem 0;">
-        <strong>Worker Nodes (ECS Instances)</strong><br>
-        <div class="component-box">kubelet</div>
-        <div class="component-box">Container Runtime</div>
-        <div class="component-box">Your Apps</div>
-    </div>
-</div>
-
-<div class="concept-card">
-    <h2>🚀 ACK Cluster Types</h2>
-    <table>
-        <tr>
-            <th>Type</th>
-            <th>Description</th>
-        </tr>
-        <tr>
-            <td><strong>Managed Kubernetes</strong></td>
-            <td>Alibaba manages control plane</td>
-        </tr>
-        <tr>
-            <td><strong>Serverless (ASK)</strong></td>
-            <td>No node management, pay per pod</td>
-        </tr>
-        <tr>
-            <td><strong>Dedicated Kubernetes</strong></td>
-            <td>Full control over all components</td>
-        </tr>
-        <tr>
-            <td><strong>Edge Kubernetes</strong></td>
-            <td>Extends K8s to edge locations</td>
-        </tr>
-    </table>
-</div>
-
-<div class="concept-card">
-    <h2>🔧 ACK Key Features</h2>
-    
-    <h3>Networking</h3>
-    <ul>
-        <li><strong>Terway</strong> - High-performance CNI plugin</li>
-        <li><strong>Flannel</strong> - Standard overlay networking</li>
-        <li>Network Policy support</li>
-        <li>SLB integration for load balancing</li>
-    </ul>
-    
-    <h3>Storage</h3>
-    <ul>
-        <li><strong>Cloud Disk</strong> - Block storage (SSD, ESSD)</li>
-        <li><strong>NAS</strong> - Shared file storage</li>
-        <li><strong>OSS</strong> - Object storage integration</li>
-        <li>Dynamic volume provisioning</li>
-    </ul>
-    
-    <h3>Auto Scaling</h3>
-    <ul>
-        <li>Horizontal Pod Autoscaler (HPA)</li>
-        <li>Vertical Pod Autoscaler (VPA)</li>
-        <li>Cluster Autoscaler</li>
-        <li>Scheduled scaling</li>
-    </ul>
-</div>
-
-<div class="concept-card">
-    <h2>💡 ACK Best Practices</h2>
-    <ul>
-        <li>Use managed clusters for easier operations</li>
-        <li>Deploy across multiple zones for HA</li>
-        <li>Use Terway CNI for better performance</li>
-        <li>Enable cluster autoscaling for cost optimization</li>
-        <li>Use ACR (Alibaba Container Registry) for faster pulls</li>
-        <li>Monitor with ARMS and Log Service</li>
-        <li>Implement pod security policies</li>
-    </ul>
-</div>
-"""
+def render_page(content, version, environment):
+    global _base_template
+    if _base_template is None:
+        _base_template = app.jinja_env.from_string(BASE_TEMPLATE)
+    return _base_template.render(content=content, version=version, environment=environment,
+                                 stylesheet_url=STYLESHEET_URL)
 
-@app.route('/')
-def home():
-    return render_template_string(BASE_TEMPLATE, content=HOME_CONTENT, version=VERSION, environment=ENVIRONMENT)
+def page_inputs():
+    return (VERSION, ENVIRONMENT)
 
-@app.route('/kubernetes')
-def kubernetes():
-    return render_template_string(BASE_TEMPLATE, content=KUBERNETES_CONTENT, version=VERSION, environment=ENVIRONMENT)
+content = ContentDirectory(CONTENT_DIR)
+pages = PageStore(render_page, page_inputs,
+                  cache_control=f'public, max-age={PAGE_MAX_AGE}',
+                  max_pages=PAGE_CACHE_SIZE)
+for content_file in content:
+    pages.register(content_file.name, content_file.read)
 
-@app.route('/ingress')
-def ingress():
-    return render_template_string(BASE_TEMPLATE, content=INGRESS_CONTENT, version=VERSION, environment=ENVIRONMENT)
+_uname = os.uname()
+_info_fragments = (None, b'', b'', b'', b'')
+_info_json = (None, b'')
 
-@app.route('/kong')
-def kong():
-    return render_template_string(BASE_TEMPLATE, content=KONG_CONTENT, version=VERSION, environment=ENVIRONMENT)
+def info_fields():
+    return {
+        'hostname': socket.gethostname(),
+        'version': VERSION,
+        'environment': ENVIRONMENT,
+        'platform': _uname.sysname,
+        'architecture': _uname.machine,
+        'python_version': sys.version.split()[0],
+    }
 
-@app.route('/ack')
-def ack():
-    return render_template_string(BASE_TEMPLATE, content=ACK_CONTENT, version=VERSION, environment=ENVIRONMENT)
+# Everything on /info except the timestamp is fixed for the life of the
+# process, so the page is cached as the document head and tail plus the
+# content bytes before and after that one cell.
+def info_fragments():
+    global _info_fragments
+    key = page_inputs()
+    if _info_fragments[0] != key:
+        rows = ''.join(INFO_ROW.format(label=name.replace('_', ' ').title(), value=escape(value))
+                       for name, value in info_fields().items())
+        rows += INFO_ROW.format(label='Timestamp', value=FRAGMENT_MARKER)
+        before, after = INFO_CONTENT.format(rows=rows).split(FRAGMENT_MARKER)
+        head, tail = pages.frame()
+        _info_fragments = (key, head, before.encode('utf-8'), after.encode('utf-8'), tail)
+    return _info_fragments
+
+@app.route('/', defaults={'path': ''})
+@app.route('/<path:path>')
+def page(path):
+    content_file = content.resolve('/' + path.rstrip('/'))
+    if content_file is None:
+        g.metrics_label = None
+        abort(404)
+    if path.endswith('/'):
+        # One URL per page: /kong/ is a permanent redirect to /kong.
+        g.metrics_label = content_file.name
+        query = request.query_string.decode('latin-1')
+        return redirect(content_file.url + (f'?{query}' if query else ''), code=301)
+    g.metrics_label = content_file.name
+    with phase('render'):
+        return pages.response(content_file.name)
+
+health_state = HealthState({'version': VERSION, 'hostname': socket.gethostname()},
+                           interval=HEALTH_CHECK_INTERVAL,
+                           max_in_flight=READINESS_MAX_IN_FLIGHT)
+health_state.add_check('pages', lambda: pages.frame() and len(content) > 0)
+if registry.multiprocess_dir:
+    health_state.add_check('metrics_dir', lambda: os.access(registry.multiprocess_dir, os.W_OK))
+health_state.refresh()
+
+PROBE_ENDPOINTS = {'health', 'liveness', 'readiness'}
+
+@app.route('/health/live')
+def liveness():
+    return Response(health_state.live_body, mimetype='application/json')
+
+@app.route('/health/ready')
+def readiness():
+    status, body = health_state.readiness()
+    return Response(body, status=status, mimetype='application/json')
 
 @app.route('/health')
 def health():
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.datetime.now().isoformat(),
-        'version': VERSION,
-        'hostname': socket.gethostname()
-    }), 200
+    return readiness()
+
+def info_chunks():
+    _, head, before, after, tail = info_fragments()
+    yield head
+    yield before + datetime.datetime.now().isoformat().encode('ascii') + after
+    yield tail
+
+def info_body():
+    return b''.join(info_chunks())
+
+def json_body(data):
+    return app.json.encode(data) + b'\n'
+
+# As with the page, only the timestamp of /api/info is encoded per call.
+def info_api_body():
+    global _info_json
+    key = page_inputs()
+    if _info_json[0] != key:
+        _info_json = (key, app.json.fragment(info_fields()))
+    timestamp = {'timestamp': datetime.datetime.now().isoformat()}
+    return app.json.encode_object(_info_json[1], timestamp) + b'\n'
+
+def metrics_body():
+    return json_body(registry.snapshot())
+
+def prometheus_body():
+    return registry.exposition().encode('utf-8')
+
+# Monitors tend to poll these in synchronized bursts, so the finished,
+# compressed body is shared for MICROCACHE_TTL seconds per negotiated
+# encoding and a burst costs one build.
+CACHED_ENDPOINTS = {
+    'info': (info_body, 'render', 'text/html'),
+    'info_api': (info_api_body, 'json', 'application/json'),
+    'metrics': (metrics_body, 'json', 'application/json'),
+    'prometheus': (prometheus_body, 'render', 'text/plain; version=0.0.4'),
+}
+
+def cached_body(endpoint, accept_encoding, timing):
+    build, phase_name, _ = CACHED_ENDPOINTS[endpoint]
+
+    def render():
+        with timing.phase(phase_name):
+            body = build()
+        with timing.phase('compression'):
+            return compress_body(body, accept_encoding)
+
+    return microcache.get((endpoint, negotiate(accept_encoding, ENCODINGS)), render)
+
+def cached_response():
+    encoding, body = cached_body(request.endpoint, request.headers.get('Accept-Encoding'), g.timing)
+    response = Response(body, mimetype=CACHED_ENDPOINTS[request.endpoint][2])
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    return response
 
 @app.route('/info')
 def info():
-    deployment_info = {
-        'hostname': socket.gethostname(),
-        'version': VERSION,
-        'environment': ENVIRONMENT,
-        'platform': os.uname().sysname,
-        'architecture': os.uname().machine,
-        'python_version': os.sys.version.split()[0],
-        'timestamp': datetime.datetime.now().isoformat()
-    }
-    
-    info_content = f"""
-    <h1 style="color: #667eea; text-align: center; margin-bottom: 2rem;">ℹ️ Deployment Information</h1>
-    <div style="background: #f8f9fa; padding: 2rem; border-radius: 10px;">
-        <table>
-            {''.join([f'<tr><td style="font-weight: 600; color: #667eea;">{key.replace("_", " ").title()}</td><td>{value}</td></tr>' for key, value in deployment_info.items()])}
-        </table>
-    </div>
-    <div style="margin-top: 2rem; padding: 1.5rem; background: #e8f5e9; border-left: 5px solid #4caf50; border-radius: 5px;">
-        <strong style="color: #2e7d32;">✅ Status:</strong> Application running successfully!
-    </div>
-    """
-    
-    return render_template_string(BASE_TEMPLATE, content=info_content, version=VERSION, environment=ENVIRONMENT)
+    if STREAM_RESPONSES:
+        encoding, chunks = stream_compressed(info_chunks(), request.headers.get('Accept-Encoding'))
+        response = Response(chunks, mimetype='text/html')
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    return cached_response()
+
+@app.route('/api/info')
+def info_api():
+    return cached_response()
 
 @app.route('/api/metrics')
 def metrics():
-    return jsonify({
-        'requests_total': 100,
-        'uptime_seconds': 3600,
-        'memory_usage_mb': 128,
-        'cpu_usage_percent': 5.2
-    })
+    return cached_response()
+
+@app.route('/metrics')
+def prometheus():
+    return cached_response()
+
+metrics_stream_events = EventStream(lambda: app.json.encode(registry.snapshot()),
+                                    interval=METRICS_STREAM_INTERVAL)
+EVENT_STREAM_HEADERS = {'X-Accel-Buffering': 'no'}
+
+# Every WSGI subscriber holds a worker thread for as long as it stays
+# connected, so by default only half the threads may be streaming, and the
+# stream keeps its admission slot and in-flight count until the client goes
+# away: readiness and admission control see a pinned thread as busy. Serve
+# large dashboards with SERVER_MODE=asgi, where a subscriber is a coroutine.
+def metrics_stream_limit(asgi=False):
+    if METRICS_STREAM_MAX_SUBSCRIBERS:
+        return METRICS_STREAM_MAX_SUBSCRIBERS
+    return 1000 if asgi else max(1, int(os.getenv('WEB_THREADS', '1')) // 2)
+
+def stream_unavailable():
+    return Response('too many metrics stream subscribers\n', status=503, mimetype='text/plain',
+                    headers={'Retry-After': str(ADMISSION_RETRY_AFTER)})
+
+def release_thread(admitted, in_flight):
+    if admitted:
+        admission.release()
+    if in_flight:
+        health_state.leave()
+
+@app.route('/api/metrics/stream')
+def metrics_stream():
+    if SYNC_WORKER:
+        return Response('the metrics stream needs a threaded worker (WEB_THREADS > 1)\n', status=501,
+                        mimetype='text/plain')
+    # The subscription, not the request teardown, releases what the request
+    # was holding; it does so when the server closes the response.
+    held = (g.pop('admitted', False), g.pop('in_flight', False))
+    subscription = metrics_stream_events.subscribe(metrics_stream_limit(), on_close=lambda: release_thread(*held))
+    if subscription is None:
+        release_thread(*held)
+        return stream_unavailable()
+    return Response(subscription, mimetype='text/event-stream', headers=EVENT_STREAM_HEADERS)
+
+# Sub-requests of /api/batch are answered from the same pre-encoded or
+# micro-cached bodies the endpoints serve, and spliced into the combined
+# document as bytes. /info contributes its JSON form.
+BATCH_PARTS = {
+    'health': lambda timing: health_state.readiness(),
+    'readiness': lambda timing: health_state.readiness(),
+    'liveness': lambda timing: (200, health_state.live_body),
+    'info': lambda timing: (200, cached_body('info_api', None, timing)[1]),
+    'info_api': lambda timing: (200, cached_body('info_api', None, timing)[1]),
+    'metrics': lambda timing: (200, cached_body('metrics', None, timing)[1]),
+}
+BATCH_NOT_FOUND = b'{"error":"not available in a batch"}'
+_batch_urls = app.url_map.bind('localhost')
+
+def batch_paths():
+    if request.method == 'POST':
+        paths = request.get_json(silent=True)
+        if isinstance(paths, dict):
+            paths = paths.get('requests')
+    else:
+        paths = request.args.getlist('path')
+    if (not isinstance(paths, list) or not paths or len(paths) > BATCH_MAX_REQUESTS
+            or not all(isinstance(path, str) for path in paths)):
+        return None
+    return paths
+
+def batch_part(path, timing):
+    try:
+        endpoint, _ = _batch_urls.match(path.partition('?')[0], 'GET')
+    except HTTPException:
+        endpoint = None
+    part = BATCH_PARTS.get(endpoint)
+    status, body = (404, BATCH_NOT_FOUND) if part is None else part(timing)
+    return b''.join((b'{"path":', json_body(path).rstrip(), b',"status":', str(status).encode('ascii'),
+                     b',"body":', body.rstrip(), b'}'))
+
+def batch_lines(paths, timing):
+    for path in paths:
+        yield batch_part(path, timing) + b'\n'
+
+@app.route('/api/batch', methods=['GET', 'POST'])
+def batch():
+    paths = batch_paths()
+    if paths is None:
+        return Response(f'expected a list of 1 to {BATCH_MAX_REQUESTS} paths\n', status=400, mimetype='text/plain')
+    if request.args.get('format') == 'ndjson' or request.accept_mimetypes.best == 'application/x-ndjson':
+        encoding, chunks = stream_compressed(batch_lines(paths, g.timing), request.headers.get('Accept-Encoding'))
+        response = Response(chunks, mimetype='application/x-ndjson')
+        response.vary.add('Accept-Encoding')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    with phase('json'):
+        parts = [batch_part(path, g.timing) for path in paths]
+    return Response(b'{"responses":[' + b','.join(parts) + b']}\n', mimetype='application/json')
+
+search_index = LazySearchIndex(lambda: [(content_file.name, content_file.url, content_file.read())
+                                         for content_file in content])
+
+@app.route('/api/search')
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return Response('expected a query in ?q=\n', status=400, mimetype='text/plain')
+    limit = min(max(request.args.get('limit', 10, type=int), 1), SEARCH_MAX_RESULTS)
+    with phase('render'):
+        total, results = search_index.get().search(query, limit)
+    with phase('json'):
+        body = json_body({'query': query, 'total': total, 'results': results})
+    return Response(body, mimetype='application/json')
+
+@app.route('/static/<name>')
+def static_asset(name):
+    asset = ASSETS.get(name)
+    if asset is None:
+        abort(404)
+    with phase('render'):
+        return serve_page(asset)
+
+# The debug surface does not exist unless DEBUG_TOKEN is set, and then only
+# answers callers presenting it.
+def require_debug_token():
+    if not DEBUG_TOKEN:
+        abort(404)
+    supplied = request.headers.get('X-Debug-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        supplied = authorization[7:]
+    if not hmac.compare_digest(supplied.encode('utf-8'), DEBUG_TOKEN.encode('utf-8')):
+        abort(403)
+
+@app.route('/debug/profile')
+def debug_profile():
+    require_debug_token()
+    if not PROFILE_SUPPORTED:
+        return Response('profiling needs a threaded worker (WEB_THREADS > 1)\n', status=501,
+                        mimetype='text/plain')
+    endpoint = request.args.get('endpoint')
+    if endpoint in profiler.untracked:
+        return Response(f'{endpoint} is served on the event loop in asgi mode and cannot be sampled\n',
+                        status=501, mimetype='text/plain')
+    seconds = request.args.get('seconds', 10, type=float)
+    interval = request.args.get('interval_ms', 5, type=float) / 1000
+    if not (math.isfinite(seconds) and math.isfinite(interval)):
+        return Response('seconds and interval_ms must be finite numbers\n', status=400, mimetype='text/plain')
+    # The interval is clamped too: a single sleep must not outlast the run.
+    seconds = max(0.0, min(seconds, PROFILE_MAX_SECONDS))
+    interval = min(max(interval, 0.001), max(seconds, 0.001))
+    try:
+        stacks = profiler.profile(seconds, interval, endpoint)
+    except ProfilerBusy:
+        return Response('a profile is already running\n', status=409, mimetype='text/plain')
+    return Response(stacks, mimetype='text/plain')
+
+@app.route('/debug/traces')
+def debug_traces():
+    require_debug_token()
+    limit = request.args.get('limit', 100, type=int)
+    traces = tracer.traces(limit=max(limit, 0), trace_id=request.args.get('trace_id'))
+    return Response(json_body({'sample_rate': tracer.sample_rate, 'traces': traces}), mimetype='application/json')
+
+# Set in the environ by the asgi adapter when it falls back to this app for a
+# request it has already admitted and counted in flight.
+ACCOUNTED = 'app.accounted'
+
+ADMISSION_EXEMPT = PROBE_ENDPOINTS | {'metrics', 'prometheus', 'debug_profile', 'debug_traces'}
+
+def client_address():
+    if ADMISSION_TRUST_FORWARDED:
+        forwarded = request.headers.get('X-Forwarded-For')
+        if forwarded:
+            return forwarded.split(',', 1)[0].strip()
+    return request.remote_addr
+
+def overloaded(rejected):
+    return Response('service overloaded, retry later\n', status=503, mimetype='text/plain',
+                    headers={'Retry-After': str(rejected.retry_after), 'Cache-Control': 'no-store'})
+
+COMPRESSED_ENDPOINTS = {'info', 'info_api', 'health', 'readiness', 'metrics', 'prometheus', 'debug_profile',
+                        'debug_traces', 'batch', 'search'}
+
+def phase(name):
+    return g.timing.phase(name)
+
+# The entry is only a dict here; the access log thread timestamps and encodes it.
+def access_entry(method, path, status, label, seconds, length, remote_addr, user_agent, trace=None):
+    entry = {
+        'time': time.time(),
+        'method': method,
+        'path': path,
+        'status': status,
+        'route': label,
+        'duration_ms': round(seconds * 1000, 3),
+        'bytes': length,
+        'remote_addr': remote_addr,
+        'user_agent': user_agent,
+    }
+    if trace is not None:
+        entry['trace_id'] = trace.trace_id
+    return entry
+
+# Returns the traceresponse header telling the caller which span served it.
+def finish_trace(trace, timing, total, method, path, label, status):
+    if trace.sampled:
+        tracer.finish(trace, timing, total, {'http.method': method, 'http.target': path,
+                                             'http.route': label, 'http.status_code': status})
+    return trace.header()
+
+@app.before_request
+def start_timer():
+    now = time.perf_counter()
+    started = request.environ.get(REQUEST_STARTED, now)
+    g.timing = RequestTiming(started)
+    g.trace = tracer.start(request.headers.get('traceparent'), g.timing)
+    g.timing.add('routing', started, now)
+    if profiler.active:
+        profiler.enter(request.endpoint)
+    if request.endpoint not in PROBE_ENDPOINTS and not request.environ.get(ACCOUNTED):
+        health_state.enter()
+        g.in_flight = True
+
+@app.before_request
+def admit_request():
+    if admission.enabled and request.endpoint not in ADMISSION_EXEMPT and not request.environ.get(ACCOUNTED):
+        try:
+            g.admitted = admission.acquire(client_address())
+        except Rejected as rejected:
+            return overloaded(rejected)
+
+@app.teardown_request
+def finish_request(exc):
+    if g.pop('admitted', False):
+        admission.release()
+    if profiler.active:
+        profiler.leave()
+    if g.pop('in_flight', False):
+        health_state.leave()
+
+# Registered before finalize_response so it runs after it and the recorded
+# latency and Server-Timing include compression.
+@app.after_request
+def record_request(response):
+    timing = g.get('timing')
+    if timing is not None:
+        total = timing.total()
+        label = g.get('metrics_label', request.endpoint)
+        registry.observe(label, response.status_code, total, timing.phases)
+        if access_log.enabled and access_log.sampled(label):
+            access_log.log(access_entry(request.method, request.path, response.status_code, label, total,
+                                        response.content_length, request.remote_addr,
+                                        request.headers.get('User-Agent'), g.trace))
+        if g.trace is not None:
+            response.headers['traceresponse'] = finish_trace(g.trace, timing, total, request.method,
+                                                             request.path, label, response.status_code)
+        if SERVER_TIMING or request.headers.get('X-Server-Timing') == '1':
+            response.headers['Server-Timing'] = timing.header(total)
+    return response
+
+@app.after_request
+def finalize_response(response):
+    policy = CACHE_POLICIES.get(request.endpoint)
+    if policy is not None:
+        response.headers.setdefault('Cache-Control', policy)
+    if request.endpoint in COMPRESSED_ENDPOINTS:
+        with phase('compression'):
+            compress_response(response, request.headers.get('Accept-Encoding'))
+    return response
+
+# Builds every per-process cache up front. Called by the preloading server in
+# the master so the forked workers share the results copy-on-write.
+def warm():
+    render_page('', *page_inputs())
+    pages.render_all(limit=pages.max_pages)
+    pages.frame()
+    info_fragments()
+    info_api_body()
+    search_index.get()
+    app.url_map.bind('localhost').match('/')
+    health_state.refresh()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=False)
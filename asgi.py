@@ -0,0 +1,369 @@
+# Asyncio-native serving mode. The lightweight routes are answered by async
+# handlers straight from the app's precomputed state, so an idle keep-alive
+# connection costs a coroutine rather than a thread. Any other route, as well
+# as 404s, redirects and errors, falls back to the Flask app in a small
+# thread pool.
+#
+#     uvicorn asgi:application
+#     SERVER_MODE=asgi gunicorn -c gunicorn.conf.py
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+import app as site
+from admission import Rejected
+from compression import compress_body, stream_compressed
+from timing import RequestTiming
+
+WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '8'))
+
+_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='asgi-wsgi')
+
+# Probes are answered on the loop, so no number of requests in flight can
+# starve them; the thread-based saturation default would only take a worker
+# with a few slow clients out of the Service.
+if 'READINESS_MAX_IN_FLIGHT' not in os.environ:
+    site.health_state.max_in_flight = 0
+_urls = site.app.url_map.bind('localhost')
+
+
+class Request:
+    __slots__ = ('method', 'path', 'headers', 'label', 'timing')
+
+    def __init__(self, scope, timing):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.label = None
+        self.timing = timing
+        headers = {}
+        for name, value in scope['headers']:
+            name = name.decode('latin-1')
+            value = value.decode('latin-1')
+            headers[name] = f'{headers[name]}, {value}' if name in headers else value
+        self.headers = headers
+
+
+def _page(page, request):
+    headers = request.headers
+    status, page_headers, body = page.respond(headers.get('accept-encoding'),
+                                              headers.get('if-none-match'),
+                                              headers.get('if-modified-since'))
+    return status, page_headers + [('Content-Type', f'{page.mimetype}; charset=utf-8')], body
+
+
+def _json(body, status=200):
+    return status, [('Content-Type', 'application/json')], body
+
+
+async def page(request, path):
+    if path.endswith('/'):
+        return None  # redirected by the Flask view
+    content_file = site.content.resolve('/' + path)
+    if content_file is None:
+        return None
+    request.label = content_file.name
+    return _page(site.pages.get(content_file.name), request)
+
+
+async def static_asset(request, name):
+    asset = site.ASSETS.get(name)
+    if asset is None:
+        return None
+    return _page(asset, request)
+
+
+async def liveness(request):
+    return _json(site.health_state.live_body)
+
+
+async def readiness(request):
+    status, body = site.health_state.readiness()
+    return _json(body, status)
+
+
+def _cached(endpoint, request):
+    encoding, body = site.cached_body(endpoint, request.headers.get('accept-encoding'), request.timing)
+    headers = [('Content-Type', f'{site.CACHED_ENDPOINTS[endpoint][2]}; charset=utf-8')]
+    if encoding is not None:
+        headers.append(('Content-Encoding', encoding))
+    return 200, headers, body
+
+
+async def info(request):
+    if site.STREAM_RESPONSES:
+        return 200, [('Content-Type', 'text/html; charset=utf-8')], site.info_chunks()
+    return _cached('info', request)
+
+
+async def info_api(request):
+    return _cached('info_api', request)
+
+
+async def metrics(request):
+    return _cached('metrics', request)
+
+
+async def prometheus(request):
+    return _cached('prometheus', request)
+
+
+async def metrics_stream(request):
+    subscription = site.metrics_stream_events.subscribe_async(site.metrics_stream_limit(asgi=True))
+    if subscription is None:
+        response = site.stream_unavailable()
+        return response.status_code, list(response.headers.items()), response.get_data()
+    headers = [('Content-Type', 'text/event-stream; charset=utf-8'), *site.EVENT_STREAM_HEADERS.items()]
+    return 200, headers, subscription
+
+
+HANDLERS = {
+    'page': page,
+    'static_asset': static_asset,
+    'liveness': liveness,
+    'readiness': readiness,
+    'health': readiness,
+    'info': info,
+    'info_api': info_api,
+    'metrics': metrics,
+    'prometheus': prometheus,
+    'metrics_stream': metrics_stream,
+}
+
+# Their requests never run on a request thread, so the profiler cannot see
+# them; /debug/profile answers 501 when asked for one.
+site.profiler.untracked = frozenset(HANDLERS)
+
+# Held open for as long as the client listens, but only as a coroutine, so
+# neither admitted nor counted as in flight.
+LONG_LIVED_ENDPOINTS = {'metrics_stream'}
+
+
+def _finalize(endpoint, request, timing, status, headers, body):
+    # Mirrors the Flask after_request hooks for the async handlers.
+    policy = site.CACHE_POLICIES.get(endpoint)
+    if policy is not None and not any(name == 'Cache-Control' for name, _ in headers):
+        headers = headers + [('Cache-Control', policy)]
+    if hasattr(body, '__aiter__'):
+        pass  # event streams go out uncompressed, one event per write
+    elif not isinstance(body, bytes):
+        encoding, body = stream_compressed(body, request.headers.get('accept-encoding'))
+        headers = headers + [('Vary', 'Accept-Encoding')]
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+    elif endpoint in site.COMPRESSED_ENDPOINTS:
+        headers = headers + [('Vary', 'Accept-Encoding')]
+        if not any(name == 'Content-Encoding' for name, _ in headers):
+            with timing.phase('compression'):
+                encoding, body = compress_body(body, request.headers.get('accept-encoding'))
+            if encoding is not None:
+                headers.append(('Content-Encoding', encoding))
+    return status, headers, body
+
+
+async def _send(send, status, headers, body, head=False, receive=None):
+    raw = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    if hasattr(body, '__aiter__'):
+        try:
+            await send({'type': 'http.response.start', 'status': status, 'headers': raw})
+        except BaseException:
+            await body.aclose()
+            raise
+        await _send_events(send, receive, body)
+        return
+    if not isinstance(body, bytes):
+        await send({'type': 'http.response.start', 'status': status, 'headers': raw})
+        if not head:
+            for chunk in body:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if status != 304:
+        raw.append((b'content-length', str(len(body)).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw})
+    await send({'type': 'http.response.body', 'body': b'' if head or status == 304 else body})
+
+
+async def _send_events(send, receive, events):
+    disconnected = asyncio.ensure_future(_disconnect(receive))
+    try:
+        async for chunk in events:
+            if disconnected.done():
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        closed = disconnected.done()
+        disconnected.cancel()
+        await events.aclose()
+    if not closed:
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    timing = RequestTiming()
+    try:
+        endpoint, view_args = _urls.match(scope['path'], scope['method'])
+    except (HTTPException, RequestRedirect):
+        endpoint = None
+    handler = HANDLERS.get(endpoint)
+    if handler is None:
+        await _call_wsgi(scope, receive, send)
+        return
+
+    request = Request(scope, timing)
+    trace = site.tracer.start(request.headers.get('traceparent'), timing)
+    admitted = False
+    if (site.admission.enabled and endpoint not in site.ADMISSION_EXEMPT
+            and endpoint not in LONG_LIVED_ENDPOINTS):
+        try:
+            admitted = site.admission.acquire(_client(scope, request), wait=False)
+        except Rejected as rejected:
+            await _send(send, 503, [('Content-Type', 'text/plain; charset=utf-8'),
+                                    ('Retry-After', str(rejected.retry_after)),
+                                    ('Cache-Control', 'no-store')],
+                        b'service overloaded, retry later\n')
+            site.registry.observe(endpoint, 503, timing.total())
+            return
+
+    counted = endpoint not in site.PROBE_ENDPOINTS and endpoint not in LONG_LIVED_ENDPOINTS
+    if counted:
+        site.health_state.enter()
+    try:
+        timing.add('routing', timing.started)
+        if endpoint in site.CACHED_ENDPOINTS:
+            # Cached builds record their own phases, and only on a miss.
+            result = await handler(request, **view_args)
+        else:
+            with timing.phase('render'):
+                result = await handler(request, **view_args)
+        if result is None:
+            # Already admitted and counted in flight here; the Flask hooks
+            # must not take a second slot for the same request.
+            await _call_wsgi(scope, receive, send, accounted=True)
+            return
+        status, headers, body = _finalize(endpoint, request, timing, *result)
+        total = timing.total()
+        if site.SERVER_TIMING or request.headers.get('x-server-timing') == '1':
+            headers = headers + [('Server-Timing', timing.header(total))]
+        label = request.label or endpoint
+        site.registry.observe(label, status, total, timing.phases)
+        if site.access_log.enabled and site.access_log.sampled(label):
+            site.access_log.log(site.access_entry(request.method, request.path, status, label, total,
+                                                  len(body) if isinstance(body, bytes) else None,
+                                                  _client(scope, request), request.headers.get('user-agent'),
+                                                  trace))
+        if trace is not None:
+            headers = headers + [('traceresponse', site.finish_trace(trace, timing, total, request.method,
+                                                                     request.path, label, status))]
+        await _send(send, status, headers, body, head=request.method == 'HEAD', receive=receive)
+    finally:
+        if counted:
+            site.health_state.leave()
+        if admitted:
+            site.admission.release()
+
+
+def _client(scope, request):
+    if site.ADMISSION_TRUST_FORWARDED:
+        forwarded = request.headers.get('x-forwarded-for')
+        if forwarded:
+            return forwarded.split(',', 1)[0].strip()
+    client = scope.get('client')
+    return client[0] if client else None
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def _call_wsgi(scope, receive, send, accounted=False):
+    body = bytearray()
+    more = True
+    while more:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    environ = _environ(scope, bytes(body))
+    if accounted:
+        environ[site.ACCOUNTED] = True
+    loop = asyncio.get_running_loop()
+    status, headers, chunks = await loop.run_in_executor(_executor, _run_wsgi, environ)
+    raw = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw})
+    await send({'type': 'http.response.body', 'body': chunks})
+
+
+def _run_wsgi(environ):
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = headers
+
+    iterable = site.app(environ, start_response)
+    try:
+        body = b''.join(iterable)
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+    return started['status'], started['headers'], body
+
+
+def _environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f'HTTP_{name}'
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
@@ -0,0 +1,156 @@
+# Per-route allocation benchmark.
+#
+#     python bench/memory.py                    # measure and check bench/memory_budgets.json
+#     python bench/memory.py --update-budgets   # store current numbers (plus headroom) as budgets
+#
+# For every route it reports, per request, the transient allocation peak and
+# the bytes/blocks still held afterwards (tracemalloc), then drives
+# --rss-requests more requests without tracing to catch steady-state RSS
+# growth. Tests can call measure_route() and assert_within_budget() directly.
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGETS = os.path.join(ROOT, 'bench', 'memory_budgets.json')
+HEADROOM = 1.5
+
+sys.path.insert(0, ROOT)
+
+from bench.throughput import DEFAULT_HEADERS, discover_routes  # noqa: E402
+from metrics import rss_bytes  # noqa: E402
+
+_IGNORED = (tracemalloc.__file__, '<frozen importlib._bootstrap>', '<unknown>')
+
+
+def _client():
+    import app as site
+    return site.app.test_client()
+
+
+def _request(client, path, headers):
+    response = client.get(path, headers=headers)
+    response.close()
+
+
+def measure_route(path, requests=200, warmup=50, headers=None, client=None):
+    headers = DEFAULT_HEADERS if headers is None else headers
+    client = client or _client()
+    for _ in range(warmup):
+        _request(client, path, headers)
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        peaks = 0
+        before = tracemalloc.take_snapshot()
+        for _ in range(requests):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            _request(client, path, headers)
+            peaks += tracemalloc.get_traced_memory()[1] - current
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, pattern) for pattern in _IGNORED]
+    diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'filename')
+    retained_bytes = sum(stat.size_diff for stat in diff)
+    retained_blocks = sum(stat.count_diff for stat in diff)
+    return {
+        'peak_kib': round(peaks / requests / 1024, 2),
+        'retained_bytes_per_request': round(retained_bytes / requests, 1),
+        'retained_blocks_per_request': round(retained_blocks / requests, 3),
+    }
+
+
+def measure_rss(routes, requests, headers=None):
+    headers = DEFAULT_HEADERS if headers is None else headers
+    client = _client()
+    paths = list(routes.values())
+    for path in paths * 20:
+        _request(client, path, headers)
+    gc.collect()
+    before = rss_bytes()
+    for i in range(requests):
+        _request(client, paths[i % len(paths)], headers)
+    gc.collect()
+    return round((rss_bytes() - before) / (1024 * 1024), 2)
+
+
+def check(results, budgets):
+    failures = []
+    for endpoint, result in results.get('routes', {}).items():
+        budget = budgets.get('routes', {}).get(endpoint, {})
+        for key, limit in budget.items():
+            if result.get(key, 0) > limit:
+                failures.append(f'{endpoint}: {key} {result[key]} > budget {limit}')
+    limit = budgets.get('rss_growth_mb')
+    if limit is not None and results.get('rss_growth_mb', 0) > limit:
+        failures.append(f"rss grew {results['rss_growth_mb']} MiB > budget {limit} MiB")
+    return failures
+
+
+def assert_within_budget(endpoint, result, budgets=None):
+    failures = check({'routes': {endpoint: result}}, load_budgets() if budgets is None else budgets)
+    assert not failures, '; '.join(failures)
+
+
+def load_budgets():
+    if not os.path.exists(BUDGETS):
+        return {}
+    with open(BUDGETS) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='per-route allocation benchmark')
+    parser.add_argument('--routes', help='comma separated endpoint names (default: every GET route)')
+    parser.add_argument('--requests', type=int, default=200, help='traced requests per route')
+    parser.add_argument('--rss-requests', type=int, default=20000, help='untraced requests for RSS growth')
+    parser.add_argument('--update-budgets', action='store_true')
+    args = parser.parse_args(argv)
+
+    routes = discover_routes()
+    if args.routes:
+        wanted = set(args.routes.split(','))
+        routes = {endpoint: path for endpoint, path in routes.items() if endpoint in wanted}
+
+    results = {'routes': {}}
+    for endpoint, path in routes.items():
+        result = results['routes'][endpoint] = measure_route(path, args.requests)
+        print(f"{endpoint:14} {path:28} peak {result['peak_kib']:>8.2f} KiB/req  "
+              f"retained {result['retained_bytes_per_request']:>8.1f} B/req "
+              f"{result['retained_blocks_per_request']:>7.3f} blocks/req")
+    results['rss_growth_mb'] = measure_rss(routes, args.rss_requests)
+    print(f"rss growth over {args.rss_requests} requests: {results['rss_growth_mb']} MiB")
+
+    if args.update_budgets:
+        budgets = {
+            'routes': {
+                endpoint: {
+                    'peak_kib': round(max(result['peak_kib'], 1.0) * HEADROOM, 1),
+                    'retained_bytes_per_request': round(max(result['retained_bytes_per_request'], 64) * HEADROOM),
+                }
+                for endpoint, result in results['routes'].items()
+            },
+            'rss_growth_mb': round(max(results['rss_growth_mb'], 2.0) * HEADROOM, 1),
+        }
+        with open(BUDGETS, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'budgets written to {os.path.relpath(BUDGETS, ROOT)}')
+        return 0
+
+    failures = check(results, load_budgets())
+    for failure in failures:
+        print(f'OVER BUDGET {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
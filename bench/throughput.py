@@ -0,0 +1,272 @@
+# Throughput and latency benchmark for every GET route of the app.
+#
+#     python bench/throughput.py --mode client     # Flask test client: framework overhead only
+#     python bench/throughput.py --mode socket     # real sockets against gunicorn.conf.py
+#     python bench/throughput.py --update-baseline # store the results as the new baseline
+#
+# Results are compared against bench/baseline.json and the run exits non-zero
+# when any route regresses beyond the thresholds stored there.
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'bench', 'baseline.json')
+# The test client runs in-process, where extra threads only measure GIL
+# hand-offs; the socket mode needs real concurrency to load the workers.
+DEFAULT_CONCURRENCY = {'client': 1, 'socket': 8}
+DEFAULT_THRESHOLDS = {'rps_drop': 0.35, 'p95_increase': 0.75}
+DEFAULT_HEADERS = {'Accept-Encoding': 'gzip, br'}
+# Worker recycling resets keep-alive connections mid-run; keep it out of the
+# numbers unless asked for.
+DEFAULT_SERVER_ENV = {'WEB_MAX_REQUESTS': '0', 'WEB_MAX_REQUESTS_JITTER': '0'}
+# The micro-cache would turn /info and the metrics routes into cache hits and
+# hide regressions in the code behind them, so both benchmarks (and the
+# in-process app they import) run with it off unless asked otherwise.
+BENCH_ENV = {'MICROCACHE_TTL': '0'}
+DEFAULT_SERVER_ENV.update(BENCH_ENV)
+for name, value in BENCH_ENV.items():
+    os.environ.setdefault(name, value)
+
+sys.path.insert(0, ROOT)
+
+
+def discover_routes():
+    import app as site
+    routes = {}
+    for rule in site.app.url_map.iter_rules():
+        if 'GET' in rule.methods and not rule.arguments and rule.endpoint not in ('page', 'metrics_stream') \
+                and not rule.rule.startswith('/debug/'):
+            routes[rule.endpoint] = rule.rule
+    for content_file in site.content:
+        routes[content_file.name] = content_file.url
+    routes['static_asset'] = site.STYLESHEET_URL
+    routes['batch'] = '/api/batch?path=/health&path=/api/info&path=/api/metrics'
+    routes['search'] = '/api/search?q=kubernetes+ingress'
+    return dict(sorted(routes.items()))
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'requests': len(ordered),
+        'rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+    }
+
+
+def drive(make_request, concurrency, duration, warmup):
+    # Each worker thread gets its own `request` callable (and so its own
+    # connection) from make_request and issues requests back to back.
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+
+    def worker():
+        request = make_request()
+        local = []
+        start.wait()
+        deadline = time.perf_counter() + warmup
+        while time.perf_counter() < deadline:
+            request()
+        deadline = time.perf_counter() + duration
+        while True:
+            began = time.perf_counter()
+            if began >= deadline:
+                break
+            try:
+                request()
+            except Exception as exc:
+                errors.append(exc)
+                request = make_request()
+                continue
+            local.append(time.perf_counter() - began)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    began = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began - warmup
+    result = summarize(latencies, elapsed)
+    result['errors'] = len(errors)
+    return result
+
+
+def client_factory(path, headers):
+    import app as site
+
+    def make_request():
+        client = site.app.test_client()
+
+        def request():
+            response = client.get(path, headers=headers)
+            response.close()
+            if response.status_code >= 500:
+                raise RuntimeError(response.status_code)
+        return request
+    return make_request
+
+
+def socket_factory(host, port, path, headers):
+    def make_request():
+        connection = http.client.HTTPConnection(host, port, timeout=10)
+
+        def request():
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 500:
+                raise RuntimeError(response.status)
+        return request
+    return make_request
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, env_overrides):
+    env = dict(os.environ, **env_overrides)
+    env['BIND'] = f'127.0.0.1:{port}'
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+                               cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health/live')
+            if connection.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('server did not start')
+
+
+def run(mode, routes, concurrency, duration, warmup, headers, server_env):
+    results = {}
+    process = None
+    if mode == 'socket':
+        port = free_port()
+        process = start_server(port, server_env)
+    try:
+        for endpoint, path in routes.items():
+            if mode == 'socket':
+                factory = socket_factory('127.0.0.1', port, path, headers)
+            else:
+                factory = client_factory(path, headers)
+            results[endpoint] = drive(factory, concurrency, duration, warmup)
+            print(f'{mode:6} {endpoint:14} {path:28} {format_result(results[endpoint])}')
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def format_result(result):
+    return (f"{result['rps']:>9.1f} rps  p50 {result['p50_ms']:>7.3f} ms  "
+            f"p95 {result['p95_ms']:>7.3f} ms  p99 {result['p99_ms']:>7.3f} ms  "
+            f"errors {result['errors']}")
+
+
+def compare(results, baseline, thresholds):
+    failures = []
+    for endpoint, result in results.items():
+        reference = baseline.get(endpoint)
+        if reference is None:
+            continue
+        if result['errors']:
+            failures.append(f"{endpoint}: {result['errors']} errors")
+        if reference['rps'] and result['rps'] < reference['rps'] * (1 - thresholds['rps_drop']):
+            failures.append(f"{endpoint}: {result['rps']} rps < baseline {reference['rps']} rps")
+        if reference['p95_ms'] and result['p95_ms'] > reference['p95_ms'] * (1 + thresholds['p95_increase']):
+            failures.append(f"{endpoint}: p95 {result['p95_ms']} ms > baseline {reference['p95_ms']} ms")
+    return failures
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE):
+        return {'thresholds': dict(DEFAULT_THRESHOLDS)}
+    with open(BASELINE) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='HTTP throughput and latency benchmark')
+    parser.add_argument('--mode', choices=('client', 'socket', 'all'), default='client')
+    parser.add_argument('--routes', help='comma separated endpoint names (default: every GET route)')
+    parser.add_argument('--concurrency', type=int,
+                        help='connections per route (default: 1 for client, 8 for socket)')
+    parser.add_argument('--duration', type=float, default=2.0, help='seconds per route')
+    parser.add_argument('--warmup', type=float, default=0.3, help='seconds per route before measuring')
+    parser.add_argument('--header', action='append', default=[], help="extra request header, 'Name: value'")
+    parser.add_argument('--server-env', action='append', default=[],
+                        help="environment for the socket-mode server, 'NAME=value'")
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args(argv)
+
+    routes = discover_routes()
+    if args.routes:
+        wanted = set(args.routes.split(','))
+        routes = {endpoint: path for endpoint, path in routes.items() if endpoint in wanted}
+    headers = dict(DEFAULT_HEADERS)
+    for header in args.header:
+        name, _, value = header.partition(':')
+        headers[name.strip()] = value.strip()
+    server_env = dict(DEFAULT_SERVER_ENV, **dict(item.split('=', 1) for item in args.server_env))
+
+    modes = ('client', 'socket') if args.mode == 'all' else (args.mode,)
+    baseline = load_baseline()
+    thresholds = {**DEFAULT_THRESHOLDS, **baseline.get('thresholds', {})}
+    results = {}
+    failures = []
+    for mode in modes:
+        concurrency = args.concurrency or DEFAULT_CONCURRENCY[mode]
+        results[mode] = run(mode, routes, concurrency, args.duration, args.warmup, headers, server_env)
+        failures += [f'{mode} {failure}' for failure in
+                     compare(results[mode], baseline.get(mode, {}), thresholds)]
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.update_baseline:
+        baseline.update(results)
+        baseline['thresholds'] = thresholds
+        with open(BASELINE, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline written to {os.path.relpath(BASELINE, ROOT)}')
+        return 0
+    for failure in failures:
+        print(f'REGRESSION {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
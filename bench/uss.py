@@ -0,0 +1,81 @@
+# Per-worker unique memory (USS) with and without the gc.freeze preload mode.
+#
+#     python bench/uss.py --workers 4 --requests 2000
+#
+# Starts gunicorn.conf.py once per mode, drives every route so each worker
+# touches all of its caches, then reads Private_Clean + Private_Dirty from
+# /proc/<pid>/smaps_rollup for every worker (Linux only).
+import argparse
+import http.client
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.throughput import DEFAULT_HEADERS, discover_routes, free_port, start_server  # noqa: E402
+
+
+def worker_pids(master):
+    children = set()
+    for task in os.listdir(f'/proc/{master}/task'):
+        with open(f'/proc/{master}/task/{task}/children') as f:
+            children.update(int(pid) for pid in f.read().split())
+    return sorted(children)
+
+
+def memory(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            parts = value.split()
+            if parts and parts[-1] == 'kB':
+                fields[name] = int(parts[0])
+    return {
+        'uss_kib': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0),
+        'pss_kib': fields.get('Pss', 0),
+        'rss_kib': fields.get('Rss', 0),
+    }
+
+
+def measure(workers, requests, gc_freeze):
+    port = free_port()
+    process = start_server(port, {
+        'WEB_CONCURRENCY': str(workers),
+        'WEB_GC_FREEZE': '1' if gc_freeze else '0',
+        'WEB_MAX_REQUESTS': '0',
+        'WEB_MAX_REQUESTS_JITTER': '0',
+    })
+    try:
+        paths = list(discover_routes().values())
+        connections = [http.client.HTTPConnection('127.0.0.1', port, timeout=10) for _ in range(workers * 2)]
+        for i in range(requests):
+            connection = connections[i % len(connections)]
+            connection.request('GET', paths[i % len(paths)], headers=DEFAULT_HEADERS)
+            connection.getresponse().read()
+        time.sleep(1)
+        return [memory(pid) for pid in worker_pids(process.pid)]
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='per-worker USS with and without gc.freeze')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    for gc_freeze in (False, True):
+        samples = measure(args.workers, args.requests, gc_freeze)
+        average = {key: sum(sample[key] for sample in samples) / len(samples) for key in samples[0]}
+        print(f"gc_freeze={'on ' if gc_freeze else 'off'} workers={len(samples)}  "
+              f"USS {average['uss_kib'] / 1024:6.2f} MiB  PSS {average['pss_kib'] / 1024:6.2f} MiB  "
+              f"RSS {average['rss_kib'] / 1024:6.2f} MiB  (per worker)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
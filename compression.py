@@ -0,0 +1,111 @@
+import functools
+import gzip
+import os
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+
+# Preferred order when the client weighs several encodings equally.
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(body, encoding, static=False):
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if static else 5)
+    return gzip.compress(body, compresslevel=9 if static else 6, mtime=0)
+
+
+def compress_variants(body):
+    variants = {}
+    for encoding in ENCODINGS:
+        data = compress(body, encoding, static=True)
+        if len(data) < len(body):
+            variants[encoding] = data
+    return variants
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_accept_encoding(header):
+    prefs = {}
+    for part in header.split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        prefs[name] = q
+    return prefs
+
+
+def negotiate(accept_encoding, available):
+    if not accept_encoding or not available:
+        return None
+    prefs = _parse_accept_encoding(accept_encoding)
+    wildcard = prefs.get('*', 0.0)
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        if encoding not in available:
+            continue
+        q = prefs.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(body, accept_encoding):
+    if len(body) < MIN_SIZE:
+        return None, body
+    encoding = negotiate(accept_encoding, ENCODINGS)
+    if encoding is None:
+        return None, body
+    return encoding, compress(body, encoding)
+
+
+def stream_compressed(chunks, accept_encoding):
+    # Streamed bodies have no known size up front, so they are compressed
+    # whenever the client accepts it. Every chunk is flushed on its own so the
+    # client can start parsing the document head before the rest exists.
+    encoding = negotiate(accept_encoding, ENCODINGS)
+    if encoding is None:
+        return None, chunks
+    return encoding, _compress_stream(chunks, encoding)
+
+
+def _compress_stream(chunks, encoding):
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_response(response, accept_encoding):
+    response.vary.add('Accept-Encoding')
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    encoding, body = compress_body(response.get_data(), accept_encoding)
+    if encoding is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,58 @@
+import mmap
+import os
+
+
+class ContentFile:
+    __slots__ = ('name', 'url', 'path')
+
+    def __init__(self, name, url, path):
+        self.name = name
+        self.url = url
+        self.path = path
+
+    def read(self):
+        # Bodies are only read when a page is first rendered; the mapping is
+        # dropped right after decoding so nothing but the rendered bytes stay
+        # resident.
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return ''
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return str(memoryview(mapped), 'utf-8')
+
+
+class ContentDirectory:
+    # Indexes every *.html file under `root` by URL path without reading it:
+    # root/kong.html -> /kong, root/guides/hpa.html -> /guides/hpa, and the
+    # `index` page -> /.
+
+    def __init__(self, root, index='home', suffix='.html'):
+        self.root = root
+        self.index = index
+        self.suffix = suffix
+        self.files = {}
+        self._by_url = {}
+        self.scan()
+
+    def scan(self):
+        files = {}
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories.sort()
+            for filename in sorted(filenames):
+                if not filename.endswith(self.suffix) or filename.startswith('.'):
+                    continue
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root)[:-len(self.suffix)].replace(os.sep, '/')
+                url = '/' if name == self.index else f'/{name}'
+                files[name] = ContentFile(name, url, path)
+        self.files = files
+        self._by_url = {file.url: file for file in files.values()}
+
+    def resolve(self, url):
+        return self._by_url.get(url)
+
+    def __iter__(self):
+        return iter(self.files.values())
+
+    def __len__(self):
+        return len(self.files)
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+import time
+
+KEEPALIVE = b': keepalive\n\n'
+
+
+def encode_event(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}\n'.encode('utf-8'))
+    if event is not None:
+        lines.append(f'event: {event}\n'.encode('utf-8'))
+    for line in data.splitlines() or [b'']:
+        lines.append(b'data: ' + line + b'\n')
+    return b''.join(lines) + b'\n'
+
+
+class EventStream:
+    # Server-Sent Events fan-out. While anyone is subscribed, one producer
+    # thread per process calls `produce()` every `interval` seconds and
+    # publishes the encoded event once; every subscriber is handed the same
+    # bytes. WSGI subscribers block on a Condition. Asyncio subscribers on
+    # one loop share a single future per event, so a tick costs one wake-up
+    # per loop rather than one per client.
+
+    def __init__(self, produce, interval=2.0, keepalive=15.0, name='metrics'):
+        self.produce = produce
+        self.interval = interval
+        self.keepalive = keepalive
+        self.name = name
+        self.subscribers = 0
+        self._seq = 0
+        self._event = b''
+        self._cond = threading.Condition()
+        self._loop_waiters = {}
+        self._thread = None
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        self.subscribers = 0
+        self._cond = threading.Condition()
+        self._loop_waiters = {}
+        self._thread = None
+
+    def join(self, limit=0):
+        # Takes a subscriber slot and returns the sequence number to start
+        # from, or None when `limit` subscribers are already connected. The
+        # check and the join happen under one lock, so the cap is exact.
+        with self._cond:
+            if limit and self.subscribers >= limit:
+                return None
+            self.subscribers += 1
+            if self._thread is None:
+                # The last event is stale if the producer was idle; wait for
+                # a fresh one instead of replaying it.
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-events', daemon=True)
+                self._thread.start()
+                return self._seq
+            return self._seq - 1 if self._seq else 0
+
+    def leave(self):
+        with self._cond:
+            self.subscribers -= 1
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self.subscribers:
+                    self._thread = None
+                    return
+            try:
+                event = self.produce()
+            except Exception:
+                time.sleep(self.interval)
+                continue
+            with self._cond:
+                self._seq += 1
+                self._event = encode_event(event, self.name, self._seq)
+                self._cond.notify_all()
+                waiters, self._loop_waiters = self._loop_waiters, {}
+            for loop, waiter in waiters.items():
+                try:
+                    loop.call_soon_threadsafe(_resolve, waiter)
+                except RuntimeError:
+                    pass  # the loop has been closed
+            time.sleep(self.interval)
+
+    def subscribe(self, limit=0, on_close=None):
+        seq = self.join(limit)
+        return None if seq is None else Subscription(self, seq, on_close)
+
+    def subscribe_async(self, limit=0):
+        seq = self.join(limit)
+        return None if seq is None else AsyncSubscription(self, seq)
+
+
+class Subscription:
+    # WSGI response body for one subscriber. The slot is taken before the
+    # view returns, and close() gives it back (plus runs `on_close`) even if
+    # the server never started iterating; the server calls it when the
+    # client goes away, at the latest on the next keep-alive write.
+
+    def __init__(self, stream, seq, on_close=None):
+        self._stream = stream
+        self._seq = seq
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._closed:
+            raise StopIteration
+        stream = self._stream
+        with stream._cond:
+            stream._cond.wait_for(lambda: stream._seq > self._seq, stream.keepalive)
+            current, event = stream._seq, stream._event
+        if current > self._seq:
+            self._seq = current
+            return event
+        return KEEPALIVE
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._stream.leave()
+        if self._on_close is not None:
+            self._on_close()
+
+
+class AsyncSubscription:
+    # The asyncio counterpart: subscribers on one loop share a single future
+    # per event. aclose() gives the slot back.
+
+    def __init__(self, stream, seq):
+        self._stream = stream
+        self._seq = seq
+        self._closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+        stream = self._stream
+        loop = asyncio.get_running_loop()
+        with stream._cond:
+            current, event = stream._seq, stream._event
+            if current <= self._seq:
+                waiter = stream._loop_waiters.get(loop)
+                if waiter is None:
+                    waiter = stream._loop_waiters[loop] = loop.create_future()
+        if current > self._seq:
+            self._seq = current
+            return event
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), stream.keepalive)
+        except asyncio.TimeoutError:
+            return KEEPALIVE
+        with stream._cond:
+            current, event = stream._seq, stream._event
+        self._seq = current
+        return event
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            self._stream.leave()
+
+
+def _resolve(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -0,0 +1,158 @@
+# Production server settings. Everything is driven by environment variables;
+# worker and thread counts default to what the container's cgroup limits can
+# actually sustain rather than the host's core count.
+import gc
+import math
+import os
+import sys
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = period = None
+    cpu_max = _read('/sys/fs/cgroup/cpu.max')  # cgroup v2: "<quota|max> <period>"
+    if cpu_max:
+        limit, _, period_text = cpu_max.partition(' ')
+        if limit != 'max':
+            quota, period = int(limit), int(period_text or 100000)
+    else:  # cgroup v1
+        quota_text = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+        period_text = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+        if quota_text and period_text and int(quota_text) > 0:
+            quota, period = int(quota_text), int(period_text)
+    if quota and period:
+        return min(cpus, quota / period)
+    return cpus
+
+
+def cgroup_memory_limit():
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        value = _read(path)
+        if value and value != 'max':
+            limit = int(value)
+            # cgroup v1 reports "unlimited" as a huge page-aligned number.
+            if limit < 1 << 60:
+                return limit
+    return None
+
+
+def auto_workers(cpus, memory_limit, worker_memory):
+    workers = max(1, math.ceil(cpus * 2)) + 1
+    if memory_limit:
+        workers = min(workers, max(1, memory_limit // worker_memory))
+    return workers
+
+
+CPUS = cgroup_cpus()
+MEMORY_LIMIT = cgroup_memory_limit()
+WORKER_MEMORY = _env_int('WEB_WORKER_MEMORY_MB', 96) * 1024 * 1024
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+
+wsgi_app = 'asgi:application' if SERVER_MODE == 'asgi' else 'app:app'
+bind = os.getenv('BIND', f"0.0.0.0:{os.getenv('PORT', '5000')}")
+workers = _env_int('WEB_CONCURRENCY', auto_workers(CPUS, MEMORY_LIMIT, WORKER_MEMORY))
+threads = _env_int('WEB_THREADS', 4)
+if SERVER_MODE == 'asgi':
+    worker_class = os.getenv('WEB_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+else:
+    worker_class = os.getenv('WEB_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+preload_app = os.getenv('WEB_PRELOAD', '1') == '1'
+# With preloading, everything the workers need is built in the master and
+# frozen out of the collector's reach before forking, so refcount-free GC
+# passes in the workers do not copy the shared pages.
+gc_freeze = preload_app and os.getenv('WEB_GC_FREEZE', '1') == '1'
+keepalive = _env_int('WEB_KEEPALIVE', 5)
+timeout = _env_int('WEB_TIMEOUT', 30)
+graceful_timeout = _env_int('WEB_GRACEFUL_TIMEOUT', 20)
+max_requests = _env_int('WEB_MAX_REQUESTS', 5000)
+max_requests_jitter = _env_int('WEB_MAX_REQUESTS_JITTER', max_requests // 10)
+backlog = _env_int('WEB_BACKLOG', 2048)
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+accesslog = os.getenv('WEB_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+# Admission control only sees requests that already hold a thread. gthread
+# accepts up to worker_connections sockets and queues them for a thread
+# without limit, so with admission on the accepted connections are bounded
+# to the threads plus the admission queue; anything beyond waits in the
+# listen backlog for another worker instead of piling up behind this one.
+# gthread also keeps at most worker_connections - threads idle keep-alive
+# connections and closes the rest after their response, so pooled ingress
+# connections beyond the queue have to reconnect; WEB_KEEPALIVE_CONNECTIONS
+# widens the bound for them, at the cost of that many more requests that
+# can wait unseen.
+admission_concurrency = _env_int('ADMISSION_MAX_CONCURRENCY', 0)
+if admission_concurrency and SERVER_MODE != 'asgi':
+    if admission_concurrency >= threads:
+        raise RuntimeError(f'ADMISSION_MAX_CONCURRENCY ({admission_concurrency}) must be below '
+                           f'WEB_THREADS ({threads}): waiting requests and probes need free threads')
+    admission_queue = _env_int('ADMISSION_MAX_QUEUE', admission_concurrency * 2)
+    keepalive_connections = _env_int('WEB_KEEPALIVE_CONNECTIONS', 0)
+    worker_connections = _env_int('WEB_WORKER_CONNECTIONS',
+                                  threads + max(1, admission_queue) + keepalive_connections)
+
+# The app reads these at import time: readiness saturation is sized from the
+# thread count, the profiler is bounded by the worker class and timeout, and
+# with several workers the metrics must be aggregated through shared files
+# so one scrape sees the whole pod.
+os.environ.setdefault('WEB_THREADS', str(threads))
+os.environ.setdefault('WEB_WORKER_CLASS', worker_class)
+os.environ.setdefault('WEB_TIMEOUT', str(timeout))
+if workers > 1:
+    os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                          os.path.join(worker_tmp_dir or '/tmp', 'flask-app-metrics'))
+
+
+if gc_freeze:
+    # Keep the master's heap compact until the freeze (no collections leaving
+    # holes for the workers to fill in); when_ready re-enables it, and the
+    # workers forked after that inherit it enabled.
+    gc.disable()
+
+
+def on_starting(server):
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.startswith('metrics_') and name.endswith('.db'):
+                os.remove(os.path.join(directory, name))
+
+
+def when_ready(server):
+    memory = f'{MEMORY_LIMIT // (1024 * 1024)}Mi' if MEMORY_LIMIT else 'unlimited'
+    server.log.info('cpus=%.2f memory=%s workers=%d threads=%d worker_class=%s preload=%s gc_freeze=%s',
+                    CPUS, memory, workers, threads, worker_class, preload_app, gc_freeze)
+    if gc_freeze:
+        site = sys.modules.get('app')
+        if site is not None:
+            site.warm()
+        gc.freeze()
+        # The arbiter lives as long as the pod; it needs its collector back.
+        gc.enable()
+        server.log.info('froze %d objects before forking workers', gc.get_freeze_count())
+
+
+def child_exit(server, worker):
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        import multiprocess
+        multiprocess.retire(directory, worker.pid)
@@ -0,0 +1,97 @@
+import datetime
+import json
+import os
+import threading
+
+
+def _encode(data):
+    return json.dumps(data, separators=(',', ':')).encode('utf-8') + b'\n'
+
+
+class HealthState:
+    # Liveness is a constant. Readiness is recomputed by a background checker
+    # every `interval` seconds; probes only pick between pre-encoded bodies,
+    # plus an in-flight comparison so a saturated worker reports not ready
+    # right away instead of at the next check.
+
+    def __init__(self, fields, interval=5.0, max_in_flight=0):
+        self.fields = dict(fields)
+        self.interval = interval
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.live_body = _encode({'status': 'alive', **self.fields})
+        self._checks = []
+        self._ready = False
+        self._ready_body = self._saturated_body = b''
+        self._counter_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+        self.refresh()
+
+    def _after_fork(self):
+        self.in_flight = 0
+        self._counter_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def add_check(self, name, check):
+        self._checks.append((name, check))
+
+    def refresh(self):
+        results = {}
+        for name, check in self._checks:
+            try:
+                results[name] = bool(check())
+            except Exception:
+                results[name] = False
+        ready = all(results.values())
+        timestamp = datetime.datetime.now().isoformat()
+        self._ready_body = _encode({
+            'status': 'healthy' if ready else 'unhealthy',
+            'ready': ready,
+            'timestamp': timestamp,
+            **self.fields,
+            'checks': results,
+        })
+        self._saturated_body = _encode({
+            'status': 'saturated',
+            'ready': False,
+            'timestamp': timestamp,
+            **self.fields,
+            'checks': results,
+        })
+        self._ready = ready
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._counter_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='health-checker', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def enter(self):
+        with self._counter_lock:
+            self.in_flight += 1
+
+    def leave(self):
+        with self._counter_lock:
+            self.in_flight -= 1
+
+    def saturated(self):
+        return 0 < self.max_in_flight <= self.in_flight
+
+    def readiness(self):
+        self.start()
+        if self.saturated():
+            return 503, self._saturated_body
+        return (200 if self._ready else 503), self._ready_body
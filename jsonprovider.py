@@ -0,0 +1,58 @@
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Fragment(bytes):
+    # Pre-encoded members of a JSON object ('"key":value,...' without the
+    # braces), spliced into encode_object() output as is.
+    __slots__ = ()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    # Flask's JSON provider, with orjson doing the compact encoding when it
+    # is installed. Anything orjson rejects (huge ints, unusual keys) falls
+    # back to the stdlib encoder. orjson writes non-ASCII text as UTF-8 rather
+    # than \u escapes; both are the same JSON.
+
+    def encode(self, obj):
+        if orjson is not None:
+            options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                options |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=self.default, option=options)
+            except TypeError:
+                pass
+        return json.dumps(obj, default=self.default, ensure_ascii=self.ensure_ascii,
+                          sort_keys=self.sort_keys, separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if not kwargs or kwargs == {'separators': (',', ':')}:
+            return self.encode(obj).decode('utf-8')
+        return super().dumps(obj, **kwargs)
+
+    def fragment(self, members):
+        return Fragment(self.encode(members)[1:-1])
+
+    def encode_object(self, *parts):
+        # Joins Fragments and dicts into one JSON object; only the dicts are
+        # serialized.
+        members = []
+        for part in parts:
+            if not isinstance(part, Fragment):
+                part = self.encode(part)[1:-1]
+            if part:
+                members.append(part)
+        return b'{' + b','.join(members) + b'}'
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.encode(obj) + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,283 @@
+import bisect
+import os
+import resource
+import threading
+import time
+
+import multiprocess
+
+# Upper bounds in seconds; observations above the last bound land in the
+# implicit +Inf bucket.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+UNMATCHED = 'unmatched'
+
+# Values are stored flat under 'kind\tendpoint\tlabel' keys so the same layout
+# works for the in-process dict and for the shared per-process mmap files.
+REQUESTS = 'requests'
+BUCKET = 'bucket'
+LATENCY_SUM = 'latency_sum'
+PHASE_SUM = 'phase_sum'
+PHASE_COUNT = 'phase_count'
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'count', 'sum')
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                if i == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+
+class LocalValues:
+    def __init__(self):
+        self._values = {}
+
+    def inc(self, key, amount=1.0):
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def items(self):
+        return list(self._values.items())
+
+
+class RouteKeys:
+    __slots__ = ('buckets', 'latency_sum', 'statuses', 'phases', 'endpoint')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.buckets = [f'{BUCKET}\t{endpoint}\t{i}' for i in range(len(LATENCY_BUCKETS) + 1)]
+        self.latency_sum = f'{LATENCY_SUM}\t{endpoint}\t'
+        self.statuses = {}
+        self.phases = {}
+
+    def status(self, code):
+        key = self.statuses.get(code)
+        if key is None:
+            key = self.statuses[code] = f'{REQUESTS}\t{self.endpoint}\t{code}'
+        return key
+
+    def phase(self, name):
+        keys = self.phases.get(name)
+        if keys is None:
+            keys = self.phases[name] = (f'{PHASE_SUM}\t{self.endpoint}\t{name}',
+                                        f'{PHASE_COUNT}\t{self.endpoint}\t{name}')
+        return keys
+
+
+class MetricsRegistry:
+    def __init__(self, multiprocess_dir=None):
+        self.started = time.time()
+        self.multiprocess_dir = multiprocess_dir
+        if multiprocess_dir:
+            os.makedirs(multiprocess_dir, exist_ok=True)
+        self._cpu_started = _cpu_seconds()
+        self._values = None
+        self._keys = {}
+        self._series = {}
+        self._series_keys = {}
+        self._lock = threading.Lock()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # Each worker accounts into its own store; the parent's numbers stay
+        # with the parent.
+        self.started = time.time()
+        self._cpu_started = _cpu_seconds()
+        self._values = None
+        self._lock = threading.Lock()
+
+    def _store(self):
+        if self._values is None:
+            if self.multiprocess_dir:
+                path = multiprocess.file_path(self.multiprocess_dir, os.getpid())
+                self._values = multiprocess.MmapValues(path)
+            else:
+                self._values = LocalValues()
+        return self._values
+
+    def observe(self, endpoint, status, seconds, phases=None):
+        endpoint = endpoint or UNMATCHED
+        keys = self._keys.get(endpoint)
+        if keys is None:
+            keys = self._keys.setdefault(endpoint, RouteKeys(endpoint))
+        with self._lock:
+            values = self._store()
+            values.inc(keys.status(status))
+            values.inc(keys.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)])
+            values.inc(keys.latency_sum, seconds)
+            if phases:
+                for name, spent in phases.items():
+                    sum_key, count_key = keys.phase(name)
+                    values.inc(sum_key, spent)
+                    values.inc(count_key)
+
+    def describe(self, kind, name, metric_type, help_text, label=None):
+        # Declares an extra series recorded through add(); kind is the
+        # storage prefix, name/type/help/label describe its exposition.
+        self._series[kind] = (name, metric_type, help_text, label)
+
+    def add(self, kind, label='', amount=1.0):
+        key = self._series_keys.get((kind, label))
+        if key is None:
+            scope = multiprocess.GAUGE if self._series[kind][1] == 'gauge' else ''
+            key = self._series_keys.setdefault((kind, label), f'{kind}\t{scope}\t{label}')
+        with self._lock:
+            self._store().inc(key, amount)
+
+    def series(self, samples=None):
+        samples = self.collect() if samples is None else samples
+        values = {kind: {} for kind in self._series}
+        for key, value in samples.items():
+            kind, _, label = key.split('\t')
+            if kind in values:
+                values[kind][label] = value
+        return values
+
+    def collect(self):
+        if self.multiprocess_dir:
+            return multiprocess.collect(self.multiprocess_dir)
+        with self._lock:
+            return dict(self._store().items())
+
+    def routes(self, samples=None):
+        statuses = {}
+        histograms = {}
+        phases = {}
+        samples = self.collect() if samples is None else samples
+        for key, value in samples.items():
+            kind, endpoint, label = key.split('\t')
+            if kind in self._series:
+                continue
+            if kind == REQUESTS:
+                statuses.setdefault(endpoint, {})[label] = int(value)
+                continue
+            if kind in (PHASE_SUM, PHASE_COUNT):
+                phase = phases.setdefault(endpoint, {}).setdefault(label, [0.0, 0])
+                phase[0 if kind == PHASE_SUM else 1] += value
+                continue
+            histogram = histograms.get(endpoint)
+            if histogram is None:
+                histogram = histograms[endpoint] = Histogram()
+            if kind == BUCKET:
+                histogram.counts[int(label)] = int(value)
+                histogram.count += int(value)
+            elif kind == LATENCY_SUM:
+                histogram.sum = value
+        return {endpoint: (statuses.get(endpoint, {}), histograms.get(endpoint, Histogram()),
+                           phases.get(endpoint, {}))
+                for endpoint in sorted(statuses)}
+
+    def snapshot(self):
+        routes = {}
+        total = 0
+        samples = self.collect()
+        for endpoint, (statuses, latency, phases) in self.routes(samples).items():
+            count = sum(statuses.values())
+            total += count
+            routes[endpoint] = {
+                'requests': count,
+                'status': statuses,
+                'latency_ms': {
+                    'p50': round(latency.quantile(0.50) * 1000, 3),
+                    'p95': round(latency.quantile(0.95) * 1000, 3),
+                    'p99': round(latency.quantile(0.99) * 1000, 3),
+                },
+                'phases_ms': {name: round(spent / count * 1000, 3)
+                              for name, (spent, count) in phases.items() if count},
+            }
+        uptime = time.time() - self.started
+        cpu = _cpu_seconds() - self._cpu_started
+        snapshot = {
+            'requests_total': total,
+            'uptime_seconds': round(uptime, 3),
+            'memory_usage_mb': round(rss_bytes() / (1024 * 1024), 1),
+            'cpu_usage_percent': round(cpu / uptime * 100, 2) if uptime else 0.0,
+            'routes': routes,
+        }
+        for kind, values in self.series(samples).items():
+            name, _, _, label = self._series[kind]
+            if label is None:
+                snapshot[name] = values.get('', 0.0)
+            else:
+                snapshot[name] = values
+        return snapshot
+
+    def exposition(self):
+        lines = [
+            '# HELP http_requests_total Total HTTP requests by endpoint and status.',
+            '# TYPE http_requests_total counter',
+        ]
+        samples = self.collect()
+        routes = self.routes(samples)
+        for endpoint, (statuses, _, _) in routes.items():
+            for status, count in sorted(statuses.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        lines += [
+            '# HELP http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        bounds = [_format_bound(bound) for bound in LATENCY_BUCKETS] + ['+Inf']
+        for endpoint, (_, latency, _) in routes.items():
+            cumulative = 0
+            for bound, count in zip(bounds, latency.counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {latency.sum!r}')
+            lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {latency.count}')
+        lines += [
+            '# HELP http_request_phase_seconds Time spent per request phase by endpoint.',
+            '# TYPE http_request_phase_seconds summary',
+        ]
+        for endpoint, (_, _, phases) in routes.items():
+            for name, (spent, count) in sorted(phases.items()):
+                labels = f'endpoint="{endpoint}",phase="{name}"'
+                lines.append(f'http_request_phase_seconds_sum{{{labels}}} {spent!r}')
+                lines.append(f'http_request_phase_seconds_count{{{labels}}} {int(count)}')
+        for kind, values in self.series(samples).items():
+            name, metric_type, help_text, label = self._series[kind]
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+            if label is None:
+                lines.append(f"{name} {values.get('', 0.0)!r}")
+                continue
+            for value_label, value in sorted(values.items()):
+                lines.append(f'{name}{{{label}="{value_label}"}} {value!r}')
+        lines.append('')
+        return '\n'.join(lines)
+
+
+def _format_bound(bound):
+    return repr(float(bound))
+
+
+def _cpu_seconds():
+    times = os.times()
+    return times.user + times.system
+
+
+def rss_bytes():
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # ru_maxrss is the peak, in KiB on Linux; good enough off Linux.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
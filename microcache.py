@@ -0,0 +1,72 @@
+import collections
+import threading
+import time
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MicroCache:
+    # Short-lived LRU cache for responses that are expensive to build but may
+    # be up to `ttl` seconds stale. Concurrent misses on one key are coalesced:
+    # the first caller builds the value and the others wait for its result
+    # instead of each building their own copy.
+
+    def __init__(self, ttl=1.0, max_entries=64, record=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._record = record or (lambda kind, label, amount: None)
+        self._entries = collections.OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key, build):
+        if not self.enabled:
+            return build()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._record('microcache', 'hit', 1)
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            self._record('microcache', 'coalesced', 1)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        self._record('microcache', 'miss', 1)
+        try:
+            flight.value = build()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.error is None:
+                    self._entries[key] = (time.monotonic() + self.ttl, flight.value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.done.set()
+        return flight.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,132 @@
+import glob
+import mmap
+import os
+import struct
+
+# File layout: an 8 byte header holding the number of used bytes, followed by
+# entries of (u32 key length, utf-8 key padded to 8 bytes, f64 value). Every
+# process only ever writes its own file; readers take plain snapshots of all
+# files without any locking. The header is bumped after an entry is fully
+# written, so a concurrent reader never sees a half-written entry.
+
+_HEADER = struct.Struct('<I4x')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_SIZE = 64 * 1024
+
+# Keys are 'kind\tendpoint\tlabel'. Gauge series are stored with this in the
+# endpoint field so a dead worker's gauges can be told apart from its
+# counters without knowing what the app registered.
+GAUGE = '~gauge'
+AGGREGATE = 'aggregate'
+
+
+class MmapValues:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _INITIAL_SIZE:
+            self._file.truncate(_INITIAL_SIZE)
+            size = _INITIAL_SIZE
+        self._capacity = size
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        self._offsets = {key: offset for key, _, offset in _entries(self._map, self._used)}
+
+    def inc(self, key, amount=1.0):
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._add(key)
+        _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def items(self):
+        return [(key, value) for key, value, _ in _entries(self._map, self._used)]
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def _add(self, key):
+        encoded = key.encode('utf-8')
+        padded = len(encoded) + (-(_KEY_LENGTH.size + len(encoded)) % 8)
+        entry = struct.pack(f'<I{padded}sd', len(encoded), encoded, 0.0)
+        end = self._used + len(entry)
+        if end > self._capacity:
+            self._grow(end)
+        self._map[self._used:end] = entry
+        offset = end - _VALUE.size
+        self._used = end
+        _HEADER.pack_into(self._map, 0, end)
+        self._offsets[key] = offset
+        return offset
+
+    def _grow(self, needed):
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        self._map.close()
+        self._file.truncate(capacity)
+        self._capacity = capacity
+        self._map = mmap.mmap(self._file.fileno(), capacity)
+
+
+def _entries(data, used):
+    pos = _HEADER.size
+    while pos < used:
+        length = _KEY_LENGTH.unpack_from(data, pos)[0]
+        pos += _KEY_LENGTH.size
+        key = bytes(data[pos:pos + length]).decode('utf-8')
+        pos += length + (-(_KEY_LENGTH.size + length) % 8)
+        yield key, _VALUE.unpack_from(data, pos)[0], pos
+        pos += _VALUE.size
+
+
+def file_path(directory, pid):
+    return os.path.join(directory, f'metrics_{pid}.db')
+
+
+def collect(directory):
+    merged = {}
+    for path in glob.glob(os.path.join(directory, 'metrics_*.db')):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            continue
+        if len(data) < _HEADER.size:
+            continue
+        used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+        for key, value, _ in _entries(data, used):
+            merged[key] = merged.get(key, 0.0) + value
+    return merged
+
+
+def retire(directory, pid):
+    # Called in the master when a worker exits: its counters are folded into
+    # the aggregate file, its gauges are dropped (a dead worker has nothing
+    # in flight), and its file is removed, so recycled workers neither grow
+    # the directory nor leave gauges stuck.
+    path = file_path(directory, pid)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return
+    if len(data) >= _HEADER.size:
+        used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+        counters = [(key, value) for key, value, _ in _entries(data, used)
+                    if value and key.split('\t', 2)[1] != GAUGE]
+        if counters:
+            aggregate = MmapValues(file_path(directory, AGGREGATE))
+            try:
+                for key, value in counters:
+                    aggregate.inc(key, value)
+            finally:
+                aggregate.close()
+    os.remove(path)
+
+
+def clear(directory):
+    for path in glob.glob(os.path.join(directory, 'metrics_*.db')):
+        os.remove(path)
@@ -0,0 +1,167 @@
+import collections
+import hashlib
+import threading
+import time
+
+from flask import Response, request
+from werkzeug.http import http_date, parse_date
+
+from compression import compress_variants, negotiate
+
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Stands in for a dynamic fragment when a page is rendered once and split.
+FRAGMENT_MARKER = '\x00fragment\x00'
+
+
+class Page:
+    __slots__ = ('name', 'key', 'body', 'mimetype', 'variants', 'etags', 'last_modified', 'headers')
+
+    def __init__(self, name, body, seed, last_modified, cache_control, mimetype='text/html', key=None):
+        self.name = name
+        self.key = key
+        self.body = body
+        self.mimetype = mimetype
+        self.variants = compress_variants(body)
+        self.last_modified = int(last_modified)
+
+        digest = hashlib.sha256(seed + body).hexdigest()[:32]
+        # Strong validators must differ per representation, so every encoded
+        # variant gets its own suffixed tag.
+        self.etags = {None: f'"{digest}"'}
+        for encoding in self.variants:
+            self.etags[encoding] = f'"{digest}-{encoding}"'
+
+        common = [
+            ('Cache-Control', cache_control),
+            ('Last-Modified', http_date(self.last_modified)),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        self.headers = {None: common + [('ETag', self.etags[None])]}
+        for encoding in self.variants:
+            self.headers[encoding] = common + [
+                ('ETag', self.etags[encoding]),
+                ('Content-Encoding', encoding),
+            ]
+
+    def select(self, accept_encoding):
+        encoding = negotiate(accept_encoding, self.variants)
+        if encoding is None:
+            return None, self.body
+        return encoding, self.variants[encoding]
+
+    def respond(self, accept_encoding, if_none_match=None, if_modified_since=None):
+        encoding, body = self.select(accept_encoding)
+        if self.not_modified(if_none_match, if_modified_since, encoding):
+            return 304, self.headers[encoding], b''
+        return 200, self.headers[encoding], body
+
+    def not_modified(self, if_none_match, if_modified_since, encoding=None):
+        if if_none_match:
+            # If-None-Match uses the weak comparison function and takes
+            # precedence over If-Modified-Since. Only the tag of the variant
+            # that would be sent matches; a client holding the gzip variant
+            # must not get a 304 for the identity one.
+            current = self.etags[encoding]
+            for tag in if_none_match.split(','):
+                tag = tag.strip()
+                if tag == '*':
+                    return True
+                if tag.startswith('W/'):
+                    tag = tag[2:]
+                if tag == current:
+                    return True
+            return False
+        if if_modified_since:
+            since = parse_date(if_modified_since)
+            return since is not None and self.last_modified <= since.timestamp()
+        return False
+
+
+def build_asset(filename, body, mimetype):
+    # Fingerprints the asset name with its content hash so it can be cached
+    # forever: app.css -> app.<hash>.css
+    stem, _, ext = filename.rpartition('.')
+    digest = hashlib.sha256(body).hexdigest()[:12]
+    return Page(f'{stem}.{digest}.{ext}', body, b'', time.time(), IMMUTABLE, mimetype)
+
+
+def serve_page(page):
+    headers = request.headers
+    status, page_headers, body = page.respond(headers.get('Accept-Encoding'),
+                                              headers.get('If-None-Match'),
+                                              headers.get('If-Modified-Since'))
+    if status == 304:
+        return Response(status=304, headers=page_headers)
+    return Response(body, mimetype=page.mimetype, headers=page_headers)
+
+
+class PageStore:
+    # Renders registered pages on first use into bytes (plus precompressed
+    # variants and validators) and serves those bytes until one of the render
+    # inputs (version, environment, ...) changes. Sources may be strings or
+    # callables, so content is only loaded when a page is first requested;
+    # at most `max_pages` rendered pages are kept, least recently used first
+    # out.
+
+    def __init__(self, render, inputs, cache_control='no-cache', max_pages=256):
+        self._render = render
+        self._inputs = inputs
+        self._cache_control = cache_control
+        self.max_pages = max_pages
+        self._sources = {}
+        self._rendered = collections.OrderedDict()
+        self._frame = (None, b'', b'')
+        self._lock = threading.Lock()
+
+    def register(self, name, source):
+        with self._lock:
+            self._sources[name] = source
+            self._rendered.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def names(self):
+        return list(self._sources)
+
+    def render_all(self, limit=None):
+        # With a limit only the first `limit` pages are rendered, e.g. no
+        # more than the store keeps anyway.
+        return {name: self.get(name) for name in self.names()[:limit]}
+
+    def frame(self):
+        # The rendered base template split around its content block, for
+        # pages that fill in their content per request.
+        key = self._inputs()
+        frame = self._frame
+        if frame[0] != key:
+            head, tail = self._render(FRAGMENT_MARKER, *key).split(FRAGMENT_MARKER)
+            frame = self._frame = (key, head.encode('utf-8'), tail.encode('utf-8'))
+        return frame[1], frame[2]
+
+    def get(self, name):
+        key = self._inputs()
+        page = self._rendered.get(name)
+        if page is None or page.key != key:
+            return self._render_page(name, key)
+        try:
+            self._rendered.move_to_end(name)
+        except KeyError:
+            pass
+        return page
+
+    def _render_page(self, name, key):
+        source = self._sources[name]
+        content = source() if callable(source) else source
+        page = Page(name, self._render(content, *key).encode('utf-8'), repr(key).encode('utf-8'),
+                    time.time(), self._cache_control, key=key)
+        with self._lock:
+            self._rendered[name] = page
+            while len(self._rendered) > self.max_pages:
+                self._rendered.popitem(last=False)
+        return page
+
+    def response(self, name):
+        return serve_page(self.get(name))
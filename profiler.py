@@ -0,0 +1,68 @@
+import collections
+import os
+import sys
+import threading
+import time
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class SamplingProfiler:
+    # Samples the stacks of threads that are serving requests. Request threads
+    # only register themselves while a profile is running, so the idle cost is
+    # one attribute check per request.
+
+    def __init__(self):
+        self.active = False
+        # Endpoints whose requests never run on a tracked thread (set by the
+        # asgi mode for its event-loop handlers).
+        self.untracked = frozenset()
+        self._threads = {}
+        self._lock = threading.Lock()
+
+    def enter(self, endpoint):
+        self._threads[threading.get_ident()] = endpoint
+
+    def leave(self):
+        self._threads.pop(threading.get_ident(), None)
+
+    def profile(self, seconds, interval=0.005, endpoint=None):
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy()
+        try:
+            self._threads.clear()
+            self.active = True
+            return self._sample(seconds, interval, endpoint)
+        finally:
+            self.active = False
+            self._threads.clear()
+            self._lock.release()
+
+    def _sample(self, seconds, interval, endpoint):
+        counts = collections.Counter()
+        me = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            for ident, tracked in list(self._threads.items()):
+                if ident == me or (endpoint and tracked != endpoint):
+                    continue
+                frame = frames.get(ident)
+                if frame is not None:
+                    counts[collapse(frame, tracked)] += 1
+            time.sleep(max(0.0, min(interval, deadline - time.monotonic())))
+        return ''.join(f'{stack} {count}\n' for stack, count in counts.most_common())
+
+
+def collapse(frame, root):
+    # Collapsed-stack format as consumed by flamegraph.pl / speedscope:
+    # root;outer;...;inner
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{os.path.basename(code.co_filename)}:{code.co_name}')
+        frame = frame.f_back
+    names.append(root or 'unmatched')
+    return ';'.join(reversed(names))
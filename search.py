@@ -0,0 +1,178 @@
+import bisect
+import html.parser
+import math
+import re
+import threading
+
+TOKEN = re.compile(r'\w+')
+SNIPPET_BEFORE = 60
+SNIPPET_AFTER = 140
+MAX_PREFIX_TERMS = 32
+
+# Okapi BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+
+class _TextExtractor(html.parser.HTMLParser):
+    SKIP = frozenset(('script', 'style'))
+    BLOCKS = frozenset(('p', 'div', 'li', 'br', 'tr', 'td', 'th', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'))
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.title = None
+        self._skipping = 0
+        self._heading = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skipping += 1
+        elif tag == 'h1' and self.title is None:
+            self._heading = []
+        if tag in self.BLOCKS:
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP:
+            self._skipping = max(0, self._skipping - 1)
+        elif tag == 'h1' and self._heading is not None:
+            self.title = ' '.join(''.join(self._heading).split())
+            self._heading = None
+        if tag in self.BLOCKS:
+            self.parts.append(' ')
+
+    def handle_data(self, data):
+        if self._skipping:
+            return
+        self.parts.append(data)
+        if self._heading is not None:
+            self._heading.append(data)
+
+
+def page_text(markup):
+    # Returns (title, text) for an HTML fragment: the first <h1> and the
+    # visible text with whitespace collapsed.
+    extractor = _TextExtractor()
+    extractor.feed(markup)
+    extractor.close()
+    return extractor.title, ' '.join(''.join(extractor.parts).split())
+
+
+def tokenize(text):
+    return [match.group().lower() for match in TOKEN.finditer(text)]
+
+
+class SearchIndex:
+    # Inverted index over the visible text of every content page, built once.
+    # A posting is (document, term frequency, offset of the first occurrence);
+    # queries only touch the postings of their own terms, are ranked with
+    # BM25, and cut their snippet around the stored offset, so nothing is
+    # scanned per query. Every query term must match; the last one also
+    # matches as a prefix, for search-as-you-type.
+
+    def __init__(self, documents):
+        # documents: iterable of (name, url, markup)
+        self.documents = []
+        self.postings = {}
+        lengths = []
+        for name, url, markup in documents:
+            title, text = page_text(markup)
+            doc = len(self.documents)
+            self.documents.append((name, url, title or name, text))
+            counts = {}
+            for match in TOKEN.finditer(text):
+                term = match.group().lower()
+                if term in counts:
+                    counts[term][0] += 1
+                else:
+                    counts[term] = [1, match.start()]
+            for term, (frequency, offset) in counts.items():
+                self.postings.setdefault(term, []).append((doc, frequency, offset))
+            lengths.append(sum(frequency for frequency, _ in counts.values()))
+        self.terms = sorted(self.postings)
+        average = (sum(lengths) / len(lengths)) if lengths else 0.0
+        self._norms = [K1 * (1 - B + B * length / average) if average else K1 for length in lengths]
+        total = len(self.documents)
+        self._idf = {term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                     for term, postings in self.postings.items()}
+
+    def _expand(self, term):
+        if term in self.postings:
+            return [term]
+        start = bisect.bisect_left(self.terms, term)
+        expanded = []
+        for candidate in self.terms[start:start + MAX_PREFIX_TERMS]:
+            if not candidate.startswith(term):
+                break
+            expanded.append(candidate)
+        return expanded
+
+    def search(self, query, limit=10):
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return 0, []
+        groups = [[term] if term in self.postings else [] for term in terms[:-1]]
+        groups.append(self._expand(terms[-1]))
+        scores = None
+        anchors = {}
+        for group in groups:
+            group_scores = {}
+            for term in group:
+                idf = self._idf[term]
+                for doc, frequency, offset in self.postings[term]:
+                    score = idf * frequency * (K1 + 1) / (frequency + self._norms[doc])
+                    group_scores[doc] = group_scores.get(doc, 0.0) + score
+                    # Snippets are anchored on the rarest matching term.
+                    if idf > anchors.get(doc, (-1.0, 0))[0]:
+                        anchors[doc] = (idf, offset)
+            if scores is None:
+                scores = group_scores
+            else:
+                scores = {doc: score + group_scores[doc] for doc, score in scores.items() if doc in group_scores}
+            if not scores:
+                return 0, []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for doc, score in ranked[:limit]:
+            name, url, title, text = self.documents[doc]
+            results.append({
+                'name': name,
+                'url': url,
+                'title': title,
+                'score': round(score, 4),
+                'snippet': _snippet(text, anchors[doc][1]),
+            })
+        return len(ranked), results
+
+
+def _snippet(text, offset):
+    start = max(0, offset - SNIPPET_BEFORE)
+    end = min(len(text), offset + SNIPPET_AFTER)
+    if start > 0:
+        space = text.find(' ', start, offset)
+        start = space + 1 if space != -1 else start
+    if end < len(text):
+        space = text.rfind(' ', offset, end)
+        end = space if space != -1 else end
+    snippet = text[start:end]
+    return ('…' if start > 0 else '') + snippet + ('…' if end < len(text) else '')
+
+
+class LazySearchIndex:
+    # Builds the index on first use (or in warm() under a preloading server)
+    # from a callable returning the (name, url, markup) documents.
+
+    def __init__(self, documents):
+        self._documents = documents
+        self._index = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        index = self._index
+        if index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = SearchIndex(self._documents())
+                index = self._index
+        return index
@@ -0,0 +1,5 @@
+import os
+
+# The app sizes itself from what gunicorn.conf.py exports; run the tests
+# against the same defaults the threaded workers get.
+os.environ.setdefault('WEB_THREADS', '4')
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from admission import AdmissionController, Rejected
+
+
+def test_disabled_by_default():
+    controller = AdmissionController()
+    assert not controller.enabled
+    assert controller.acquire('client') is False
+
+
+def test_token_bucket_allows_burst_then_rejects():
+    controller = AdmissionController(rate=1, burst=3)
+    for _ in range(3):
+        controller.check_rate('a')
+    with pytest.raises(Rejected) as rejected:
+        controller.check_rate('a')
+    assert rejected.value.reason == 'rate_limited'
+    assert rejected.value.retry_after >= 1
+    assert controller.shed['rate_limited'] == 1
+
+
+def test_token_bucket_is_per_client():
+    controller = AdmissionController(rate=1, burst=1)
+    controller.check_rate('a')
+    controller.check_rate('b')
+    with pytest.raises(Rejected):
+        controller.check_rate('a')
+
+
+def test_token_bucket_refills():
+    controller = AdmissionController(rate=100, burst=1)
+    controller.check_rate('a')
+    with pytest.raises(Rejected):
+        controller.check_rate('a')
+    time.sleep(0.02)
+    controller.check_rate('a')
+
+
+def test_token_bucket_skips_unknown_client():
+    controller = AdmissionController(rate=1, burst=1)
+    for _ in range(3):
+        controller.check_rate(None)
+
+
+def test_token_bucket_forgets_oldest_client():
+    controller = AdmissionController(rate=1, burst=1, max_clients=2)
+    for client in ('a', 'b', 'c'):
+        controller.check_rate(client)
+    controller.check_rate('a')  # evicted, so it starts with a full bucket again
+
+
+def test_concurrency_limit_without_queue():
+    controller = AdmissionController(max_concurrency=1)
+    assert controller.acquire() is True
+    with pytest.raises(Rejected) as rejected:
+        controller.acquire()
+    assert rejected.value.reason == 'queue_full'
+    controller.release()
+    assert controller.acquire() is True
+    assert controller.in_flight == 1
+
+
+def test_no_wait_rejects_even_with_queue_room():
+    controller = AdmissionController(max_concurrency=1, max_queue=4)
+    controller.acquire()
+    with pytest.raises(Rejected):
+        controller.acquire(wait=False)
+
+
+def test_queued_request_takes_released_slot():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+    controller.acquire()
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(controller.acquire()))
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while controller.waiting == 0 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    with pytest.raises(Rejected) as rejected:
+        controller.acquire()
+    assert rejected.value.reason == 'queue_full'
+    controller.release()
+    waiter.join()
+    assert admitted == [True]
+    assert controller.in_flight == 1
+    assert controller.waiting == 0
+
+
+def test_queue_timeout():
+    controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.01, retry_after=3)
+    controller.acquire()
+    with pytest.raises(Rejected) as rejected:
+        controller.acquire()
+    assert rejected.value.reason == 'queue_timeout'
+    assert rejected.value.retry_after == 3
+    assert controller.waiting == 0
+
+
+def test_route_sheds_when_full(monkeypatch):
+    import app as site
+    monkeypatch.setattr(site.admission, 'max_concurrency', 1)
+    monkeypatch.setattr(site.admission, 'max_queue', 0)
+    entered = threading.Event()
+    release = threading.Event()
+    index = site.search_index.get()
+
+    def blocking_get():
+        entered.set()
+        release.wait(5)
+        return index
+
+    monkeypatch.setattr(site.search_index, 'get', blocking_get)
+    client = site.app.test_client()
+    worker = threading.Thread(target=lambda: site.app.test_client().get('/api/search?q=kong'))
+    worker.start()
+    try:
+        assert entered.wait(5)
+        shed = client.get('/api/info')
+        assert shed.status_code == 503
+        assert shed.headers['Retry-After'] == str(site.admission.retry_after)
+        assert shed.headers['Cache-Control'] == 'no-store'
+        assert client.get('/health/ready').status_code == 200  # exempt
+    finally:
+        release.set()
+        worker.join()
+    assert site.admission.in_flight == 0
+    assert client.get('/api/info').status_code == 200
+    assert site.admission.in_flight == 0
@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import app as site
+import asgi
+
+
+def scope(path, method='GET', headers=(), query_string=b''):
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': query_string,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+        'http_version': '1.1',
+        'scheme': 'http',
+        'client': ('127.0.0.1', 50000),
+        'server': ('testserver', 80),
+    }
+
+
+def receiver(disconnect=None):
+    # The request body, then nothing until `disconnect` is set.
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await (disconnect or asyncio.Event()).wait()
+        return {'type': 'http.disconnect'}
+    return receive
+
+
+async def call(path, method='GET', headers=(), query_string=b''):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await asgi.application(scope(path, method, headers, query_string), receiver(), send)
+    start = messages[0]
+    headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in start['headers']}
+    return start['status'], headers, b''.join(message.get('body', b'') for message in messages[1:])
+
+
+def request(path, method='GET', headers=(), query_string=b''):
+    return asyncio.run(call(path, method, headers, query_string))
+
+
+def test_slow_clients_do_not_saturate_readiness():
+    async def run():
+        release = asyncio.Event()
+
+        async def slow_send(message):
+            await release.wait()
+
+        blocked = [asyncio.ensure_future(asgi.application(scope('/kong'), receiver(), slow_send))
+                   for _ in range(3)]
+        await asyncio.sleep(0.05)
+        in_flight = site.health_state.in_flight
+        ready = await call('/health/ready')
+        release.set()
+        await asyncio.gather(*blocked)
+        return in_flight, ready
+
+    in_flight, (status, _, body) = asyncio.run(run())
+    assert in_flight == 3
+    assert site.READINESS_MAX_IN_FLIGHT == 3  # what the threaded workers would use
+    assert status == 200, body
+    assert site.health_state.in_flight == 0
+
+
+def test_page_negotiates_and_revalidates():
+    status, headers, body = request('/kong', headers=[('Accept-Encoding', 'gzip')])
+    assert status == 200
+    assert headers['content-encoding'] == 'gzip'
+    assert headers['content-length'] == str(len(body))
+    status, _, body = request('/kong', headers=[('Accept-Encoding', 'gzip'), ('If-None-Match', headers['etag'])])
+    assert (status, body) == (304, b'')
+    assert request('/kong', headers=[('If-None-Match', headers['etag'])])[0] == 200
+
+
+def test_head_sends_headers_only():
+    status, headers, body = request('/kong', method='HEAD')
+    assert status == 200
+    assert int(headers['content-length']) > 0
+    assert body == b''
+
+
+def test_json_routes_match_flask():
+    client = site.app.test_client()
+    for path in ('/health/live', '/api/info'):
+        status, headers, body = request(path)
+        expected = client.get(path)
+        assert status == expected.status_code
+        assert headers['cache-control'] == expected.headers['Cache-Control']
+        assert json.loads(body).keys() == expected.get_json().keys()
+
+
+def test_fallbacks_are_served_by_flask():
+    status, headers, _ = request('/kong/', query_string=b'a=1')
+    assert (status, headers['location']) == (301, '/kong?a=1')
+    assert request('/missing')[0] == 404
+    status, _, body = request('/api/search', query_string=b'q=kong')
+    assert status == 200 and b'"results"' in body
+    assert site.health_state.in_flight == 0
+
+
+def test_fallback_is_admitted_once(monkeypatch):
+    # One slot and no queue: a second admission in the Flask hooks would be
+    # rejected.
+    monkeypatch.setattr(site.admission, 'max_concurrency', 1)
+    status, _, _ = request('/kong/')
+    assert status == 301
+    assert site.admission.in_flight == 0
+    assert site.health_state.in_flight == 0
+
+
+def test_full_worker_rejects_without_waiting(monkeypatch):
+    monkeypatch.setattr(site.admission, 'max_concurrency', 1)
+    monkeypatch.setattr(site.admission, 'max_queue', 10)
+    site.admission.acquire()
+    try:
+        status, headers, _ = request('/kong')
+    finally:
+        site.admission.release()
+    assert status == 503
+    assert headers['retry-after'] == str(site.admission.retry_after)
+    assert request('/health/live')[0] == 200  # probes are exempt
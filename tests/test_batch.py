@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import app as site
+
+
+@pytest.fixture
+def client():
+    return site.app.test_client()
+
+
+def test_get(client):
+    response = client.get('/api/batch?path=/health/live&path=/api/info&path=/nope')
+    assert response.status_code == 200
+    parts = response.get_json()['responses']
+    assert [(part['path'], part['status']) for part in parts] == [
+        ('/health/live', 200), ('/api/info', 200), ('/nope', 404)]
+    assert parts[0]['body'] == client.get('/health/live').get_json()
+
+
+@pytest.mark.parametrize('payload', [['/health/live'], {'requests': ['/health/live']}])
+def test_post(client, payload):
+    response = client.post('/api/batch', json=payload)
+    assert response.get_json()['responses'][0]['status'] == 200
+
+
+@pytest.mark.parametrize('query', ['', '&'.join(['path=/health'] * (site.BATCH_MAX_REQUESTS + 1))])
+def test_rejects_bad_requests(client, query):
+    assert client.get(f'/api/batch?{query}').status_code == 400
+
+
+def test_rejects_non_string_paths(client):
+    assert client.post('/api/batch', json=[1]).status_code == 400
+
+
+def test_ndjson(client):
+    response = client.get('/api/batch?path=/health/live&path=/api/metrics&format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data().splitlines()]
+    assert [line['status'] for line in lines] == [200, 200]
@@ -0,0 +1,32 @@
+import pytest
+
+from compression import ENCODINGS, negotiate
+
+PREFERRED = ENCODINGS[0]
+
+
+@pytest.mark.parametrize('header, available, expected', [
+    (None, ENCODINGS, None),
+    ('', ENCODINGS, None),
+    ('gzip', (), None),
+    ('gzip', ENCODINGS, 'gzip'),
+    ('GZIP', ENCODINGS, 'gzip'),
+    ('identity', ENCODINGS, None),
+    ('gzip;q=0', ENCODINGS, None),
+    ('gzip;q=bogus', ENCODINGS, None),
+    ('*', ENCODINGS, PREFERRED),
+    ('*;q=0', ENCODINGS, None),
+    ('deflate, *;q=0.5', ENCODINGS, PREFERRED),
+    ('gzip, br', ('gzip',), 'gzip'),
+    ('br;q=0, *', ENCODINGS, 'gzip'),
+])
+def test_negotiate(header, available, expected):
+    assert negotiate(header, available) == expected
+
+
+def test_negotiate_prefers_higher_quality():
+    assert negotiate('br;q=0.5, gzip;q=0.8', ('br', 'gzip')) == 'gzip'
+
+
+def test_negotiate_breaks_ties_in_server_order():
+    assert negotiate('gzip, br', ENCODINGS) == PREFERRED
@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+
+import pytest
+
+import app as site
+import asgi
+from events import KEEPALIVE, EventStream, encode_event
+from tests.test_asgi import receiver, scope
+
+
+def counter():
+    values = itertools.count(1)
+    return lambda: str(next(values)).encode('utf-8')
+
+
+def test_encode_event():
+    assert encode_event(b'a\nb', 'metrics', 3) == b'id: 3\nevent: metrics\ndata: a\ndata: b\n\n'
+    assert encode_event(b'') == b'data: \n\n'
+
+
+def test_subscribers_share_fresh_events():
+    stream = EventStream(counter(), interval=0.01, keepalive=5)
+    first = stream.subscribe()
+    second = stream.subscribe()
+    try:
+        assert next(first).startswith(b'id: 1\n')
+        assert next(second).startswith(b'id: ')
+        assert next(first) > b'id: 1\n'
+    finally:
+        first.close()
+        second.close()
+    assert stream.subscribers == 0
+
+
+def test_keepalive_while_idle():
+    stream = EventStream(lambda: b'x', interval=60, keepalive=0.01)
+    subscription = stream.subscribe()
+    try:
+        next(subscription)
+        assert next(subscription) == KEEPALIVE
+    finally:
+        subscription.close()
+
+
+def test_join_enforces_limit():
+    stream = EventStream(lambda: b'x', interval=60)
+    subscriptions = [stream.subscribe(limit=2) for _ in range(3)]
+    assert subscriptions[2] is None
+    assert stream.subscribers == 2
+    for subscription in subscriptions[:2]:
+        subscription.close()
+    assert stream.subscribe(limit=2) is not None
+
+
+def test_close_leaves_once_even_if_never_iterated():
+    closed = []
+    stream = EventStream(lambda: b'x', interval=60)
+    subscription = stream.subscribe(on_close=lambda: closed.append(1))
+    assert stream.subscribers == 1
+    subscription.close()
+    subscription.close()
+    assert stream.subscribers == 0
+    assert closed == [1]
+    with pytest.raises(StopIteration):
+        next(subscription)
+
+
+def test_async_subscription():
+    stream = EventStream(counter(), interval=0.01, keepalive=5)
+
+    async def run():
+        subscription = stream.subscribe_async()
+        try:
+            return [await subscription.__anext__() for _ in range(2)]
+        finally:
+            await subscription.aclose()
+            await subscription.aclose()
+
+    first, second = asyncio.run(run())
+    assert first.startswith(b'id: ') and second > first
+    assert stream.subscribers == 0
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(site, 'METRICS_STREAM_MAX_SUBSCRIBERS', 2)
+    return site.app.test_client()
+
+
+def test_route_holds_its_thread_until_closed(client, monkeypatch):
+    monkeypatch.setattr(site.admission, 'max_concurrency', 3)
+    responses = [client.get('/api/metrics/stream') for _ in range(3)]
+    try:
+        assert [response.status_code for response in responses] == [200, 200, 503]
+        assert responses[0].mimetype == 'text/event-stream'
+        assert site.metrics_stream_events.subscribers == 2
+        assert site.health_state.in_flight == 2
+        assert site.admission.in_flight == 2
+    finally:
+        for response in responses:
+            response.close()
+    assert site.metrics_stream_events.subscribers == 0
+    assert site.health_state.in_flight == 0
+    assert site.admission.in_flight == 0
+
+
+def test_route_refused_on_sync_worker(client, monkeypatch):
+    monkeypatch.setattr(site, 'SYNC_WORKER', True)
+    response = client.get('/api/metrics/stream')
+    assert response.status_code == 501
+    assert site.metrics_stream_events.subscribers == 0
+    assert site.health_state.in_flight == 0
+
+
+def test_asgi_route_streams_until_disconnect(monkeypatch):
+    monkeypatch.setattr(site.metrics_stream_events, 'interval', 0.01)
+
+    async def run():
+        disconnect = asyncio.Event()
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+            if len(messages) == 3:
+                disconnect.set()
+
+        await asgi.application(scope('/api/metrics/stream'), receiver(disconnect), send)
+        return messages
+
+    messages = asyncio.run(run())
+    assert messages[0]['status'] == 200
+    assert (b'content-type', b'text/event-stream; charset=utf-8') in messages[0]['headers']
+    assert messages[1]['body'].startswith(b'id: ')
+    assert site.metrics_stream_events.subscribers == 0
+    assert site.health_state.in_flight == 0
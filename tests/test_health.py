@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+import app as site
+
+
+@pytest.fixture
+def client():
+    return site.app.test_client()
+
+
+def test_liveness(client):
+    response = client.get('/health/live')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'alive'
+
+
+def test_readiness(client):
+    response = client.get('/health/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready'] is True
+    assert site.health_state.in_flight == 0  # probes are not counted
+
+
+def test_saturated_while_requests_are_in_flight(client, monkeypatch):
+    monkeypatch.setattr(site.health_state, 'max_in_flight', 1)
+    entered = threading.Event()
+    release = threading.Event()
+    index = site.search_index.get()
+
+    def blocking_get():
+        entered.set()
+        release.wait(5)
+        return index
+
+    monkeypatch.setattr(site.search_index, 'get', blocking_get)
+    worker = threading.Thread(target=lambda: site.app.test_client().get('/api/search?q=kong'))
+    worker.start()
+    try:
+        assert entered.wait(5)
+        assert site.health_state.in_flight == 1
+        response = client.get('/health/ready')
+        assert response.status_code == 503
+        assert response.get_json()['status'] == 'saturated'
+    finally:
+        release.set()
+        worker.join()
+    assert site.health_state.in_flight == 0
+    assert client.get('/health/ready').status_code == 200
+
+
+def test_failed_request_leaves_in_flight(client, monkeypatch):
+    def broken():
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(site.search_index, 'get', broken)
+    assert client.get('/api/search?q=kong').status_code == 500
+    assert site.health_state.in_flight == 0
@@ -0,0 +1,24 @@
+import pytest
+
+from bench.memory import assert_within_budget, load_budgets, measure_route
+from bench.throughput import discover_routes
+
+ROUTES = discover_routes()
+BUDGETS = load_budgets()
+
+
+@pytest.mark.parametrize('endpoint', sorted(set(ROUTES) & set(BUDGETS.get('routes', {}))))
+def test_route_within_budget(endpoint):
+    assert_within_budget(endpoint, measure_route(ROUTES[endpoint]), BUDGETS)
+
+
+def test_every_route_has_a_budget():
+    assert sorted(set(ROUTES) - set(BUDGETS['routes'])) == []
+
+
+def test_assert_within_budget_reports_overruns():
+    budgets = {'routes': {'home': {'peak_kib': 10, 'retained_bytes_per_request': 100}}}
+    assert_within_budget('home', {'peak_kib': 10, 'retained_bytes_per_request': 100}, budgets)
+    assert_within_budget('unknown', {'peak_kib': 1000}, budgets)
+    with pytest.raises(AssertionError, match='home: peak_kib 10.5 > budget 10'):
+        assert_within_budget('home', {'peak_kib': 10.5, 'retained_bytes_per_request': 100}, budgets)
@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+from microcache import MicroCache
+
+
+def recorder():
+    counts = {}
+
+    def record(kind, label, amount):
+        counts[label] = counts.get(label, 0) + amount
+    return counts, record
+
+
+def test_reuses_value_within_ttl():
+    counts, record = recorder()
+    cache = MicroCache(ttl=60, record=record)
+    builds = []
+    assert cache.get('k', lambda: builds.append(1) or 'v') == 'v'
+    assert cache.get('k', lambda: builds.append(1) or 'w') == 'v'
+    assert len(builds) == 1
+    assert counts == {'miss': 1, 'hit': 1}
+
+
+def test_rebuilds_after_ttl():
+    cache = MicroCache(ttl=0.01)
+    cache.get('k', lambda: 'old')
+    time.sleep(0.02)
+    assert cache.get('k', lambda: 'new') == 'new'
+
+
+def test_disabled_always_builds():
+    cache = MicroCache(ttl=0)
+    assert not cache.enabled
+    cache.get('k', lambda: 'old')
+    assert cache.get('k', lambda: 'new') == 'new'
+
+
+def test_evicts_least_recently_used():
+    cache = MicroCache(ttl=60, max_entries=2)
+    cache.get('a', lambda: 'a')
+    cache.get('b', lambda: 'b')
+    cache.get('a', lambda: 'stale')
+    cache.get('c', lambda: 'c')
+    assert cache.get('a', lambda: 'rebuilt') == 'a'
+    assert cache.get('b', lambda: 'rebuilt') == 'rebuilt'
+
+
+def test_concurrent_misses_build_once():
+    counts, record = recorder()
+    cache = MicroCache(ttl=60, record=record)
+    release = threading.Event()
+    builds = []
+
+    def build():
+        builds.append(1)
+        release.wait(5)
+        return 'v'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', build))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while counts.get('coalesced', 0) < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ['v'] * 8
+    assert len(builds) == 1
+    assert counts == {'miss': 1, 'coalesced': 7}
+
+
+def test_waiters_see_the_leaders_error_and_nothing_is_cached():
+    cache = MicroCache(ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+
+    def build():
+        started.set()
+        release.wait(5)
+        raise ValueError('boom')
+
+    errors = []
+
+    def get():
+        try:
+            cache.get('k', build)
+        except ValueError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=get)
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=get)
+    follower.start()
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+    assert len(errors) == 2
+    assert cache.get('k', lambda: 'v') == 'v'
+
+
+def test_clear():
+    cache = MicroCache(ttl=60)
+    cache.get('k', lambda: 'old')
+    cache.clear()
+    assert cache.get('k', lambda: 'new') == 'new'
+
+
+def test_build_errors_propagate():
+    cache = MicroCache(ttl=60)
+    with pytest.raises(KeyError):
+        cache.get('k', lambda: {}['missing'])
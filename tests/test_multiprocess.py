@@ -0,0 +1,66 @@
+import os
+
+import multiprocess
+from multiprocess import AGGREGATE, GAUGE, MmapValues, collect, file_path, retire
+
+
+def test_values_survive_reopening(tmp_path):
+    path = file_path(tmp_path, 1)
+    values = MmapValues(path)
+    values.inc('requests\thome\t200')
+    values.inc('requests\thome\t200', 2)
+    values.inc('latency\t\tpage', 0.25)
+    values.close()
+
+    values = MmapValues(path)
+    assert values.items() == [('requests\thome\t200', 3.0), ('latency\t\tpage', 0.25)]
+    values.inc('requests\thome\t200')
+    assert dict(values.items())['requests\thome\t200'] == 4.0
+    values.close()
+
+
+def test_grows_past_initial_size(tmp_path):
+    values = MmapValues(file_path(tmp_path, 1))
+    keys = [f'requests\t\troute-{i:05}-{"x" * 40}' for i in range(2000)]
+    for key in keys:
+        values.inc(key)
+    assert os.path.getsize(values.path) > multiprocess._INITIAL_SIZE
+    assert [key for key, _ in values.items()] == keys
+    values.close()
+
+
+def test_non_ascii_keys(tmp_path):
+    values = MmapValues(file_path(tmp_path, 1))
+    values.inc('requests\t\tcafé')
+    assert values.items() == [('requests\t\tcafé', 1.0)]
+    values.close()
+
+
+def test_collect_sums_every_worker(tmp_path):
+    for pid, amount in ((1, 1), (2, 2)):
+        values = MmapValues(file_path(tmp_path, pid))
+        values.inc('requests\thome\t200', amount)
+        values.inc(f'only\t\t{pid}')
+        values.close()
+    (tmp_path / 'metrics_3.db').write_bytes(b'\x00')  # truncated file is skipped
+    assert collect(tmp_path) == {'requests\thome\t200': 3.0, 'only\t\t1': 1.0, 'only\t\t2': 1.0}
+
+
+def test_retire_folds_counters_and_drops_gauges(tmp_path):
+    values = MmapValues(file_path(tmp_path, 1))
+    values.inc('requests\thome\t200', 5)
+    values.inc(f'in_flight\t{GAUGE}\t', 2)
+    values.close()
+    values = MmapValues(file_path(tmp_path, 2))
+    values.inc('requests\thome\t200', 1)
+    values.inc(f'in_flight\t{GAUGE}\t', 1)
+    values.close()
+
+    retire(tmp_path, 1)
+    retire(tmp_path, 1)  # already gone
+    assert not os.path.exists(file_path(tmp_path, 1))
+    assert os.path.exists(file_path(tmp_path, AGGREGATE))
+    assert collect(tmp_path) == {'requests\thome\t200': 6.0, f'in_flight\t{GAUGE}\t': 1.0}
+
+    retire(tmp_path, 2)
+    assert collect(tmp_path) == {'requests\thome\t200': 6.0}
@@ -0,0 +1,71 @@
+import pytest
+from werkzeug.http import http_date
+
+from pages import Page, PageStore
+
+BODY = b'<p>' + b'hello world ' * 200 + b'</p>'
+LAST_MODIFIED = 1700000000
+
+
+@pytest.fixture
+def page():
+    return Page('home', BODY, b'seed', LAST_MODIFIED, 'no-cache')
+
+
+def test_variants_have_their_own_etags(page):
+    assert 'gzip' in page.variants
+    assert len(set(page.etags.values())) == len(page.etags)
+
+
+@pytest.mark.parametrize('accept_encoding', [None, 'gzip'])
+def test_matching_etag_is_not_modified(page, accept_encoding):
+    encoding, _ = page.select(accept_encoding)
+    status, _, body = page.respond(accept_encoding, page.etags[encoding])
+    assert (status, body) == (304, b'')
+
+
+def test_weak_and_listed_etags_match(page):
+    tag = page.etags['gzip']
+    assert page.respond('gzip', f'"other", W/{tag}')[0] == 304
+    assert page.respond('gzip', '*')[0] == 304
+
+
+def test_etag_of_another_encoding_does_not_match(page):
+    assert page.respond(None, page.etags['gzip'])[0] == 200
+    assert page.respond('gzip', page.etags[None])[0] == 200
+
+
+def test_if_modified_since(page):
+    assert page.respond(None, None, http_date(LAST_MODIFIED))[0] == 304
+    assert page.respond(None, None, http_date(LAST_MODIFIED - 1))[0] == 200
+    assert page.respond(None, None, 'not a date')[0] == 200
+
+
+def test_if_none_match_takes_precedence(page):
+    assert page.respond(None, '"other"', http_date(LAST_MODIFIED))[0] == 200
+
+
+def test_render_all_stops_at_limit():
+    store = PageStore(lambda content, *key: content, lambda: ('v1',), max_pages=2)
+    for name in ('a', 'b', 'c'):
+        store.register(name, lambda name=name: f'<p>{name}</p>')
+    assert list(store.render_all(limit=store.max_pages)) == ['a', 'b']
+    assert list(store.render_all()) == ['a', 'b', 'c']
+
+
+def test_page_route_revalidates():
+    import app as site
+    client = site.app.test_client()
+    response = client.get('/kong', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    etag = response.headers['ETag']
+
+    revalidated = client.get('/kong', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['ETag'] == etag
+    assert revalidated.get_data() == b''
+    assert client.get('/kong', headers={'If-None-Match': etag}).status_code == 200
+
+    since = client.get('/kong', headers={'If-Modified-Since': response.headers['Last-Modified']})
+    assert since.status_code == 304
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+import app as site
+
+TOKEN = 'secret'
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(site, 'DEBUG_TOKEN', TOKEN)
+    monkeypatch.setattr(site, 'PROFILE_MAX_SECONDS', 0.2)
+    monkeypatch.setattr(site.profiler, 'untracked', frozenset())
+    return site.app.test_client()
+
+
+def profile(client, **args):
+    began = time.monotonic()
+    response = client.get('/debug/profile', query_string=args, headers={'X-Debug-Token': TOKEN})
+    return response, time.monotonic() - began
+
+
+def test_needs_token(client):
+    assert client.get('/debug/profile').status_code == 403
+
+
+def test_seconds_are_capped(client):
+    response, elapsed = profile(client, seconds=30)
+    assert response.status_code == 200
+    assert elapsed < 1
+
+
+def test_interval_cannot_outlast_the_run(client):
+    response, elapsed = profile(client, seconds=0.01, interval_ms=3000)
+    assert response.status_code == 200
+    assert elapsed < 1
+
+
+@pytest.mark.parametrize('args', [{'seconds': 'inf'}, {'seconds': 'nan'}, {'interval_ms': 'inf'},
+                                  {'interval_ms': 'nan'}])
+def test_rejects_non_finite_values(client, args):
+    assert profile(client, **args)[0].status_code == 400
+
+
+def test_refuses_untracked_endpoints(client, monkeypatch):
+    monkeypatch.setattr(site.profiler, 'untracked', frozenset({'page'}))
+    assert profile(client, endpoint='page', seconds=0.01)[0].status_code == 501
+
+
+def test_refused_on_sync_worker(client, monkeypatch):
+    monkeypatch.setattr(site, 'PROFILE_SUPPORTED', False)
+    assert profile(client, seconds=0.01)[0].status_code == 501
@@ -0,0 +1,60 @@
+import pytest
+
+import app as site
+from search import SearchIndex, page_text
+
+DOCUMENTS = [
+    ('a', '/a', '<h1>Kubernetes ingress</h1><p>An ingress routes traffic into kubernetes.</p>'),
+    ('b', '/b', '<h1>Kong</h1><p>Kong is an API gateway and can act as an ingress controller.</p>'),
+    ('c', '/c', '<h1>Other</h1><script>kubernetes</script><p>Nothing relevant.</p>'),
+]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SearchIndex(DOCUMENTS)
+
+
+def test_page_text_skips_scripts_and_takes_the_title():
+    assert page_text('<h1>Title</h1><script>x()</script><p>a\n  b</p>') == ('Title', 'Title a b')
+
+
+def test_ranks_by_relevance(index):
+    total, results = index.search('ingress')
+    assert total == 2
+    assert [result['name'] for result in results] == ['a', 'b']
+    assert results[0]['title'] == 'Kubernetes ingress'
+
+
+def test_every_term_must_match(index):
+    assert [result['name'] for result in index.search('kong ingress')[1]] == ['b']
+    assert index.search('kong kubernetes') == (0, [])
+
+
+def test_last_term_matches_as_prefix(index):
+    assert [result['name'] for result in index.search('gate')[1]] == ['b']
+    assert index.search('gate way') == (0, [])
+
+
+def test_ignores_script_text_and_empty_queries(index):
+    assert 'c' not in [result['name'] for result in index.search('kubernetes')[1]]
+    assert index.search('  ') == (0, [])
+
+
+def test_snippet_is_cut_around_the_match():
+    text = ' '.join(['filler'] * 50) + ' needle ' + ' '.join(['filler'] * 50)
+    _, results = SearchIndex([('x', '/x', f'<p>{text}</p>')]).search('needle')
+    snippet = results[0]['snippet']
+    assert 'needle' in snippet
+    assert snippet.startswith('…') and snippet.endswith('…')
+
+
+def test_route():
+    client = site.app.test_client()
+    assert client.get('/api/search').status_code == 400
+    response = client.get('/api/search?q=kong&limit=1000')
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['query'] == 'kong'
+    assert 0 < len(body['results']) <= site.SEARCH_MAX_RESULTS
+    assert body['results'][0]['url'].startswith('/')
@@ -0,0 +1,35 @@
+import pytest
+
+from tracing import parse_traceparent
+
+TRACE_ID = '4bf92f3577b34da6a3ce929d0e0e4736'
+PARENT_ID = '00f067aa0ba902b7'
+
+
+@pytest.mark.parametrize('flags, sampled', [('01', True), ('00', False), ('03', True), ('02', False)])
+def test_parses_sampled_flag(flags, sampled):
+    assert parse_traceparent(f'00-{TRACE_ID}-{PARENT_ID}-{flags}') == (TRACE_ID, PARENT_ID, sampled)
+
+
+def test_ignores_surrounding_whitespace():
+    assert parse_traceparent(f' 00-{TRACE_ID}-{PARENT_ID}-01 ') == (TRACE_ID, PARENT_ID, True)
+
+
+def test_accepts_extra_fields_from_future_versions():
+    assert parse_traceparent(f'01-{TRACE_ID}-{PARENT_ID}-01-extra') == (TRACE_ID, PARENT_ID, True)
+
+
+@pytest.mark.parametrize('header', [
+    None,
+    '',
+    f'00-{TRACE_ID}-{PARENT_ID}',
+    f'00-{TRACE_ID}-{PARENT_ID}-01-extra',
+    f'ff-{TRACE_ID}-{PARENT_ID}-01',
+    f'00-{TRACE_ID.upper()}-{PARENT_ID}-01',
+    f'00-{TRACE_ID[:-1]}g-{PARENT_ID}-01',
+    f'00-{TRACE_ID}-{PARENT_ID}0-1',
+    f'00-{"0" * 32}-{PARENT_ID}-01',
+    f'00-{TRACE_ID}-{"0" * 16}-01',
+])
+def test_rejects_malformed(header):
+    assert parse_traceparent(header) is None
@@ -0,0 +1,59 @@
+import time
+
+REQUEST_STARTED = 'app.request_started'
+
+
+class RequestClock:
+    # WSGI middleware stamping the moment a request enters the app, so the
+    # time Flask spends on routing and context setup is accounted for too.
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        environ[REQUEST_STARTED] = time.perf_counter()
+        return self.wsgi_app(environ, start_response)
+
+
+class RequestTiming:
+    # `spans` is only a list for requests being traced, which then also keep
+    # every phase interval instead of just the per-name totals.
+    __slots__ = ('started', 'phases', 'spans')
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.phases = {}
+        self.spans = None
+
+    def add(self, name, started, ended=None):
+        ended = time.perf_counter() if ended is None else ended
+        self.phases[name] = self.phases.get(name, 0.0) + (ended - started)
+        if self.spans is not None:
+            self.spans.append((name, started, ended))
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def header(self, total):
+        parts = [f'{name};dur={seconds * 1000:.3f}' for name, seconds in self.phases.items()]
+        parts.append(f'total;dur={total * 1000:.3f}')
+        return ', '.join(parts)
+
+
+class _Phase:
+    __slots__ = ('timing', 'name', 'started')
+
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timing.add(self.name, self.started)
+        return False
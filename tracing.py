@@ -0,0 +1,95 @@
+import collections
+import random
+import threading
+import time
+
+_HEX = frozenset('0123456789abcdef')
+_ZERO_TRACE = '0' * 32
+_ZERO_SPAN = '0' * 16
+
+
+def parse_traceparent(header):
+    # W3C trace context: version-traceid-parentid-flags, lowercase hex.
+    # Returns (trace_id, parent_id, sampled) or None when the header is
+    # missing or malformed, in which case a new trace is started.
+    if not header or len(header) < 55:
+        return None
+    parts = header.strip().split('-')
+    if len(parts) < 4:
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if (len(version) != 2 or version == 'ff' or len(trace_id) != 32 or len(parent_id) != 16
+            or len(flags) != 2 or (version == '00' and len(parts) != 4)):
+        return None
+    if not _HEX.issuperset(version + trace_id + parent_id + flags):
+        return None
+    if trace_id == _ZERO_TRACE or parent_id == _ZERO_SPAN:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class Trace:
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'sampled')
+
+    def __init__(self, trace_id, parent_id, sampled):
+        self.trace_id = trace_id
+        self.span_id = f'{random.getrandbits(64):016x}'
+        self.parent_id = parent_id
+        self.sampled = sampled
+
+    def header(self):
+        return f'00-{self.trace_id}-{self.span_id}-{"01" if self.sampled else "00"}'
+
+
+class Tracer:
+    # Head-based sampling: a request carrying a traceparent follows its
+    # caller's sampled flag, any other request is sampled at `sample_rate`.
+    # Unsampled requests without a traceparent get no Trace at all, so the
+    # cost there is one header lookup and one random draw. Sampled requests
+    # keep their phase intervals (see RequestTiming.spans) and finish into a
+    # ring buffer of the last `buffer_size` traces, plus `export` if set.
+
+    def __init__(self, sample_rate=0.0, buffer_size=1000, export=None):
+        self.sample_rate = sample_rate
+        self.export = export
+        self._traces = collections.deque(maxlen=buffer_size)
+        self._lock = threading.Lock()
+
+    def start(self, traceparent, timing):
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace = Trace(parent[0], parent[1], parent[2])
+        elif self.sample_rate > 0.0 and random.random() < self.sample_rate:
+            trace = Trace(f'{random.getrandbits(128):032x}', None, True)
+        else:
+            return None
+        if trace.sampled:
+            timing.spans = []
+        return trace
+
+    def finish(self, trace, timing, total, attributes):
+        started = time.time() - total
+        record = {
+            'trace_id': trace.trace_id,
+            'span_id': trace.span_id,
+            'parent_id': trace.parent_id,
+            'time': started,
+            'duration_ms': round(total * 1000, 3),
+            'attributes': attributes,
+            'spans': [{'name': name,
+                       'offset_ms': round((begin - timing.started) * 1000, 3),
+                       'duration_ms': round((end - begin) * 1000, 3)}
+                      for name, begin, end in timing.spans],
+        }
+        with self._lock:
+            self._traces.append(record)
+        if self.export is not None:
+            self.export.log(dict(record))
+
+    def traces(self, limit=None, trace_id=None):
+        with self._lock:
+            records = list(self._traces)
+        records.reverse()
+        if trace_id:
+            records = [record for record in records if record['trace_id'] == trace_id]
+        return records[:limit] if limit else records